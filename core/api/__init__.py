@@ -50,7 +50,7 @@ async def lifespan(app: FastAPI):  # type: ignore
     global db, parser_registry, encryption, llm
 
     # Initialize database
-    db = VectorDatabase()
+    db = VectorDatabase(persist_directory=os.getenv("CODEXA_CHROMA_DIR", "./chroma_data"))
 
     # Initialize parser registry
     parser_registry = ParserRegistry()
@@ -210,15 +210,16 @@ async def index_documents(request: IndexRequest) -> IndexResponse:
             content = parsed["content"]
             if request.encrypt:
                 content = encryption.encrypt_to_base64(content)
-                parsed["metadata"]["encrypted"] = "true"
             
-            # Prepare metadata
+            # Prepare metadata (parse results are cached and shared, so never mutate them)
             metadata = {
                 "file_type": parsed["file_type"],
                 "file_name": parsed["file_name"],
                 "project": project,  # Always include project
                 **parsed["metadata"],
             }
+            if request.encrypt:
+                metadata["encrypted"] = "true"
             
             return (abs_file_path, {
                 "content": content,
@@ -339,15 +340,16 @@ async def index_directory(request: IndexDirectoryRequest) -> IndexResponse:
             content = parsed["content"]
             if request.encrypt:
                 content = encryption.encrypt_to_base64(content)
-                parsed["metadata"]["encrypted"] = "true"
             
-            # Prepare metadata
+            # Prepare metadata (parse results are cached and shared, so never mutate them)
             metadata = {
                 "file_type": parsed["file_type"],
                 "file_name": parsed["file_name"],
                 "project": project,  # Always include project
                 **parsed["metadata"],
             }
+            if request.encrypt:
+                metadata["encrypted"] = "true"
             
             return (file_path, {
                 "content": content,
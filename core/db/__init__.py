@@ -100,7 +100,10 @@ class VectorDatabase:
         # Convert non-string metadata values to strings for ChromaDB
         serialized_metadata = {}
         for key, value in full_metadata.items():
-            if isinstance(value, (list, dict)):
+            if isinstance(value, tuple):
+                # Parsers return name lists as tuples; store them in list form
+                serialized_metadata[key] = str(list(value))
+            elif isinstance(value, (list, dict)):
                 serialized_metadata[key] = str(value)
             else:
                 serialized_metadata[key] = str(value)
@@ -159,7 +162,9 @@ class VectorDatabase:
                 # Serialize metadata
                 serialized_metadata = {}
                 for key, value in full_metadata.items():
-                    if isinstance(value, (list, dict)):
+                    if isinstance(value, tuple):
+                        serialized_metadata[key] = str(list(value))
+                    elif isinstance(value, (list, dict)):
                         serialized_metadata[key] = str(value)
                     else:
                         serialized_metadata[key] = str(value)
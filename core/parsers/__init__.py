@@ -1,24 +1,181 @@
 """File parsers for different document types."""
 
-from typing import Dict, Any, Protocol
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, Optional, Protocol, Tuple, Type
+import ast
+import hashlib
+import mmap
 import os
-from pathlib import Path
+import re
+import threading
 import frontmatter
 import markdown
 
 
+# Top-level (column 0) def/class statements
+_TOP_DEF_RE = re.compile(r"^(?:async[ \t]+)?(def|class)[ \t]+([A-Za-z_]\w*)", re.MULTILINE)
+# Module docstring: a triple-quoted string that is the first statement
+_MODULE_DOCSTRING_RE = re.compile(
+    r"\A(?:[ \t]*(?:#[^\n]*)?\n)*[ \t]*[rRuU]?(\"\"\"|\'\'\')(.*?)\1", re.DOTALL
+)
+
+
+# File type tags reported in parse results
+FT_MD = "md"
+FT_PY = "py"
+
+# Files at least this large are memory-mapped instead of read into a bytes object
+_MMAP_THRESHOLD = 64 * 1024
+
+
+def _read_source(file_path: str) -> str:
+    """
+    Read a UTF-8 text file the way ``open(file_path, "r").read()`` would.
+
+    Large files are decoded straight from a memory map, skipping the
+    intermediate copy of the raw bytes. Small files take a single read()
+    call, with no fstat to size the buffer first.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        File content with universal newlines
+    """
+    return _read_source_digest(file_path, with_digest=False)[0]
+
+
+def _read_source_digest(file_path: str, with_digest: bool = True) -> Tuple[str, Optional[bytes]]:
+    """
+    Read a UTF-8 text file like _read_source, optionally hashing its raw bytes.
+
+    Args:
+        file_path: Path to the file
+        with_digest: Also compute a 16-byte blake2b digest of the file bytes
+
+    Returns:
+        Tuple of (file content, digest or None)
+    """
+    digest = None
+    with open(file_path, "rb", buffering=0) as f:
+        data = f.read(_MMAP_THRESHOLD)
+        if len(data) < _MMAP_THRESHOLD:
+            # A short read from a regular file means end of file
+            if with_digest:
+                digest = hashlib.blake2b(data, digest_size=16).digest()
+            text = data.decode("utf-8")
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if with_digest:
+                    digest = hashlib.blake2b(mm, digest_size=16).digest()
+                text = str(mm, "utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, digest
+
+
+# AST fields holding nested statements (or except handlers / match cases)
+_BLOCK_FIELDS = frozenset(("body", "orelse", "finalbody", "handlers", "cases"))
+
+# HTML tags in rendered Markdown
+_HTML_TAG_RE = re.compile("<[^<]+?>")
+# YAML frontmatter fenced by "---" lines at the very start of a document
+_FRONTMATTER_RE = re.compile(r"\A---[ \t]*\n(.*?)\n---[ \t]*(?:\n|\Z)", re.DOTALL)
+# A "key: value" line that YAML would load as a plain string
+_SIMPLE_YAML_LINE_RE = re.compile(
+    r"([A-Za-z_][\w-]*)[ \t]*:[ \t]+"
+    # No line breaks or characters YAML rejects
+    r"(?=\S)([^\x00-\x08\x0a-\x1f\x7f-\x9f\u2028\u2029\ufeff\ufffe\uffff\ud800-\udfff]*?)[ \t]*"
+)
+# Values YAML would give another meaning to: indicators, quotes, comments,
+# numbers, dates, booleans and null
+_YAML_SPECIAL_VALUE_RE = re.compile(
+    r"[-?:,\[\]{}#&*!|>'\"%@`]|.*(?:\s#|:\s|:$)|[-+.]?\d|\.(?i:inf|nan)"
+    r"|(?:=|<<|(?i:true|false|yes|no|on|off|y|n|null|~))$"
+)
+
+
+def _split_frontmatter(content: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Split a Markdown document into frontmatter metadata and body.
+
+    Frontmatter made only of flat ``key: plain string`` lines is split by
+    hand; anything else is handed to python-frontmatter (and YAML).
+
+    Args:
+        content: Markdown source
+
+    Returns:
+        Tuple of (metadata, body)
+    """
+    match = _FRONTMATTER_RE.match(content)
+    if match is not None:
+        metadata: Dict[str, Any] = {}
+        for line in match.group(1).split("\n"):
+            if not line.strip():
+                continue
+            kv = _SIMPLE_YAML_LINE_RE.fullmatch(line)
+            if kv is None or _YAML_SPECIAL_VALUE_RE.match(kv.group(2)):
+                break
+            metadata[kv.group(1)] = kv.group(2)
+        else:
+            return metadata, content[match.end():].strip()
+
+    post = frontmatter.loads(content)
+    return (dict(post.metadata) if post.metadata else {}), post.content
+
+
+def _python_metadata(
+    functions: List[str], classes: List[str], docstring: Optional[str]
+) -> Mapping[str, Any]:
+    """Build read-only Python metadata with the names frozen into tuples."""
+    metadata: Dict[str, Any] = {"functions": tuple(functions), "classes": tuple(classes)}
+    if docstring:
+        metadata["docstring"] = docstring
+    return MappingProxyType(metadata)
+
+
+def _scan_python_metadata(content: str) -> Mapping[str, Any]:
+    """
+    Extract top-level function and class names and the module docstring with regexes.
+
+    Much cheaper than building an AST and works on source with syntax errors,
+    but misses methods and nested definitions.
+
+    Args:
+        content: Python source code
+
+    Returns:
+        Read-only metadata mapping
+    """
+    functions: List[str] = []
+    classes: List[str] = []
+    for kind, name in _TOP_DEF_RE.findall(content):
+        (functions if kind == "def" else classes).append(name)
+
+    match = _MODULE_DOCSTRING_RE.match(content)
+    docstring = match.group(2).strip() if match else None
+    return _python_metadata(functions, classes, docstring)
+
+
 class FileParser(Protocol):
     """Protocol for file parsers."""
 
-    def parse(self, file_path: str) -> Dict[str, Any]:
+    def parse(self, file_path: str) -> Mapping[str, Any]:
         """Parse a file and return content with metadata."""
         ...
 
+    def parse_text(self, content: str, name: str) -> Mapping[str, Any]:
+        """Parse in-memory file content and return content with metadata."""
+        ...
+
 
 class MarkdownParser:
     """Parser for Markdown files."""
 
-    def parse(self, file_path: str) -> Dict[str, Any]:
+    def parse(self, file_path: str) -> Mapping[str, Any]:
         """
         Parse a Markdown file.
 
@@ -26,31 +183,60 @@ class MarkdownParser:
             file_path: Path to the markdown file
 
         Returns:
-            Dictionary containing content and metadata
+            Read-only mapping of content and metadata
+        """
+        return self.parse_text(_read_source(file_path), os.path.basename(file_path))
+
+    def parse_text(self, content: str, name: str) -> Mapping[str, Any]:
+        """
+        Parse Markdown source that is already in memory.
+
+        Args:
+            content: Markdown source, optionally with YAML frontmatter
+            name: File name to report in the result
+
+        Returns:
+            Read-only mapping of content and metadata
         """
-        with open(file_path, "r", encoding="utf-8") as f:
-            post = frontmatter.load(f)
+        metadata, body = _split_frontmatter(content)
 
         # Convert markdown to plain text for indexing
-        html = markdown.markdown(post.content)
+        html = markdown.markdown(body)
         # Simple HTML tag removal for content indexing
-        import re
-
-        text = re.sub("<[^<]+?>", "", html)
+        text = _HTML_TAG_RE.sub("", html)
 
-        return {
+        return MappingProxyType({
             "content": text,
-            "raw_content": post.content,
-            "metadata": dict(post.metadata) if post.metadata else {},
-            "file_type": "md",
-            "file_name": os.path.basename(file_path),
-        }
+            "raw_content": body,
+            "metadata": MappingProxyType(metadata),
+            "file_type": FT_MD,
+            "file_name": name,
+        })
 
 
 class PythonParser:
     """Parser for Python files."""
 
-    def parse(self, file_path: str) -> Dict[str, Any]:
+    # Maximum number of sources whose extracted metadata is kept
+    _META_CACHE_SIZE = 256
+
+    def __init__(self, deep: bool = True) -> None:
+        """
+        Initialize the parser.
+
+        Args:
+            deep: Walk the full AST, including methods and nested functions.
+                When False, only top-level definitions are found, with a regex
+                scan instead of ast.parse.
+        """
+        self.deep = deep
+        # Larger sources (often generated or vendored code) get the regex scan
+        self.max_parse_bytes = int(os.getenv("CODEXA_PYTHON_PARSE_MAX_BYTES", str(1024 * 1024)))
+        # blake2b digest of the source -> extracted metadata, oldest first
+        self._meta_cache: Dict[bytes, Mapping[str, Any]] = {}
+        self._meta_lock = threading.Lock()
+
+    def parse(self, file_path: str) -> Mapping[str, Any]:
         """
         Parse a Python file.
 
@@ -58,52 +244,117 @@ class PythonParser:
             file_path: Path to the Python file
 
         Returns:
-            Dictionary containing content and metadata
+            Read-only mapping of content and metadata
         """
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        return self.parse_text(_read_source(file_path), os.path.basename(file_path))
 
-        # Extract docstrings and comments for better searchability
-        import ast
-
-        metadata: Dict[str, Any] = {
-            "functions": [],
-            "classes": [],
-        }
-
-        try:
-            tree = ast.parse(content)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    metadata["functions"].append(node.name)
-                elif isinstance(node, ast.ClassDef):
-                    metadata["classes"].append(node.name)
-
-            # Extract module docstring
-            module_docstring = ast.get_docstring(tree)
-            if module_docstring:
-                metadata["docstring"] = module_docstring
-        except SyntaxError:
-            # If parsing fails, still index the raw content
-            pass
-
-        return {
+    def parse_text(self, content: str, name: str) -> Mapping[str, Any]:
+        """
+        Parse Python source that is already in memory.
+
+        Args:
+            content: Python source code
+            name: File name to report in the result
+
+        Returns:
+            Read-only mapping of content and metadata
+        """
+        if not self.deep:
+            return self._result(content, _scan_python_metadata(content), name)
+
+        source = content.encode("utf-8")
+        if len(source) > self.max_parse_bytes:
+            return self._result(content, _scan_python_metadata(content), name)
+
+        # Identical source always yields the same metadata, so skip ast.parse for it
+        digest = hashlib.blake2b(source, digest_size=16).digest()
+        with self._meta_lock:
+            metadata = self._meta_cache.get(digest)
+
+        if metadata is None:
+            try:
+                metadata = self._extract_metadata(content)
+            except SyntaxError:
+                # If parsing fails, still index the raw content and whatever
+                # top-level names a regex scan finds (not cached)
+                metadata = _scan_python_metadata(content)
+            else:
+                with self._meta_lock:
+                    if len(self._meta_cache) >= self._META_CACHE_SIZE:
+                        del self._meta_cache[next(iter(self._meta_cache))]
+                    self._meta_cache[digest] = metadata
+
+        return self._result(content, metadata, name)
+
+    @staticmethod
+    def _result(content: str, metadata: Mapping[str, Any], name: str) -> Mapping[str, Any]:
+        """Build the read-only parse result."""
+        return MappingProxyType({
             "content": content,
             "metadata": metadata,
-            "file_type": "py",
-            "file_name": os.path.basename(file_path),
-        }
+            "file_type": FT_PY,
+            "file_name": name,
+        })
+
+    @staticmethod
+    def _extract_metadata(content: str) -> Mapping[str, Any]:
+        """
+        Extract function and class names and the module docstring.
+
+        Args:
+            content: Python source code
+
+        Returns:
+            Read-only metadata mapping
+
+        Raises:
+            SyntaxError: If the source cannot be parsed
+        """
+        # Extract docstrings and comments for better searchability
+        functions: List[str] = []
+        classes: List[str] = []
+
+        tree = ast.parse(content)
+        # Breadth-first over statement blocks only, in ast.walk order.
+        # Definitions are statements, so expression subtrees can be skipped.
+        queue = deque(tree.body)
+        while queue:
+            node = queue.popleft()
+            node_type = type(node)
+            if node_type is ast.FunctionDef or node_type is ast.AsyncFunctionDef:
+                functions.append(node.name)
+            elif node_type is ast.ClassDef:
+                classes.append(node.name)
+            for field in node._fields:
+                if field in _BLOCK_FIELDS:
+                    queue.extend(getattr(node, field))
+
+        # Extract module docstring
+        return _python_metadata(functions, classes, ast.get_docstring(tree))
 
 
 class ParserRegistry:
     """Registry for file parsers."""
 
+    # Lowercased file extension -> parser class
+    _EXT_MAP: Dict[str, Type[FileParser]] = {
+        ".md": MarkdownParser,
+        ".py": PythonParser,
+    }
+
+    # Maximum number of parse results kept by parse_file, per cache level
+    _CACHE_SIZE = 256
+    _CONTENT_CACHE_SIZE = 1024
+
     def __init__(self) -> None:
         """Initialize the parser registry."""
-        self.parsers: Dict[str, FileParser] = {
-            ".md": MarkdownParser(),
-            ".py": PythonParser(),
-        }
+        self.parsers: Dict[str, FileParser] = {ext: cls() for ext, cls in self._EXT_MAP.items()}
+        # (absolute path, mtime in ns, size) -> parse result, oldest first
+        self._cache: Dict[Tuple[str, int, int], Mapping[str, Any]] = {}
+        # (parser class, blake2b digest of the file bytes) -> parse result, oldest first
+        self._content_cache: Dict[Tuple[type, bytes], Mapping[str, Any]] = {}
+        # parse_file is called from API worker threads
+        self._cache_lock = threading.Lock()
 
     def get_parser(self, file_path: str) -> FileParser:
         """
@@ -118,16 +369,21 @@ class ParserRegistry:
         Raises:
             ValueError: If no parser is available for the file type
         """
-        ext = Path(file_path).suffix.lower()
+        ext = os.path.splitext(file_path)[1].lower()
         parser = self.parsers.get(ext)
         if parser is None:
             raise ValueError(f"No parser available for file type: {ext}")
         return parser
 
-    def parse_file(self, file_path: str) -> Dict[str, Any]:
+    def parse_file(self, file_path: str) -> Mapping[str, Any]:
         """
         Parse a file using the appropriate parser.
 
+        Results are cached by path, modification time and size, so parsing an
+        unchanged file again returns the same (read-only) object. When that
+        misses (a touched, copied or rewritten file), a second cache keyed by
+        a digest of the file bytes still avoids re-parsing identical content.
+
         Args:
             file_path: Path to the file
 
@@ -135,4 +391,147 @@ class ParserRegistry:
             Parsed content and metadata
         """
         parser = self.get_parser(file_path)
-        return parser.parse(file_path)
+        key = self._cache_key(file_path)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        content, digest = _read_source_digest(file_path)
+        name = os.path.basename(file_path)
+        content_key = (type(parser), digest)
+        with self._cache_lock:
+            result = self._content_cache.get(content_key)
+        if result is None:
+            result = parser.parse_text(content, name)
+            self._cache_put(self._content_cache, content_key, result, self._CONTENT_CACHE_SIZE)
+        else:
+            result = _with_file_name(result, name)
+        self._cache_put(self._cache, key, result, self._CACHE_SIZE)
+        return result
+
+    def parse_files(
+        self, file_paths: Iterable[str], *, max_workers: Optional[int] = None, chunksize: int = 32
+    ) -> Iterator[Mapping[str, Any]]:
+        """
+        Parse many files, spreading the work over worker processes.
+
+        Markdown rendering and ``ast.parse`` are CPU-bound and hold the GIL,
+        so threads do not help. The files are read and hashed here and go
+        through the same two cache levels as :meth:`parse_file`; only
+        distinct, uncached content is sent to the workers.
+
+        Args:
+            file_paths: Paths of the files to parse
+            max_workers: Number of worker processes (default: CPU count)
+            chunksize: Files sent to a worker at a time
+
+        Yields:
+            Parsed content and metadata, in the order of ``file_paths``
+
+        Raises:
+            ValueError: If no parser is available for one of the files
+            OSError: If one of the files cannot be read
+        """
+        paths = list(file_paths)
+        parsers = [self.get_parser(path) for path in paths]
+        keys = [self._cache_key(path) for path in paths]
+        with self._cache_lock:
+            results: List[Optional[Mapping[str, Any]]] = [self._cache.get(key) for key in keys]
+        misses = [i for i, result in enumerate(results) if result is None]
+
+        if len(misses) <= 1 or max_workers == 1:
+            for i in misses:
+                results[i] = self.parse_file(paths[i])
+            yield from results
+            return
+
+        # (parser class, digest) -> indexes of the files with that content
+        pending: Dict[Tuple[type, bytes], List[int]] = {}
+        contents: Dict[Tuple[type, bytes], str] = {}
+        for i in misses:
+            content, digest = _read_source_digest(paths[i])
+            content_key = (type(parsers[i]), digest)
+            with self._cache_lock:
+                result = self._content_cache.get(content_key)
+            if result is not None:
+                results[i] = _with_file_name(result, os.path.basename(paths[i]))
+                self._cache_put(self._cache, keys[i], results[i], self._CACHE_SIZE)
+            elif content_key in pending:
+                pending[content_key].append(i)
+            else:
+                pending[content_key] = [i]
+                contents[content_key] = content
+
+        firsts = [indexes[0] for indexes in pending.values()]
+        names = [os.path.basename(paths[i]) for i in firsts]
+        if len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                parsed = [
+                    _freeze_result(result)
+                    for result in executor.map(
+                        _parse_in_worker,
+                        [os.path.splitext(paths[i])[1].lower() for i in firsts],
+                        list(contents.values()),
+                        names,
+                        chunksize=chunksize,
+                    )
+                ]
+        else:
+            parsed = [
+                parsers[i].parse_text(content, name)
+                for i, content, name in zip(firsts, contents.values(), names)
+            ]
+
+        for (content_key, indexes), result in zip(pending.items(), parsed):
+            self._cache_put(self._content_cache, content_key, result, self._CONTENT_CACHE_SIZE)
+            for i in indexes:
+                results[i] = _with_file_name(result, os.path.basename(paths[i]))
+                self._cache_put(self._cache, keys[i], results[i], self._CACHE_SIZE)
+
+        yield from results
+
+    @staticmethod
+    def _cache_key(file_path: str) -> Tuple[str, int, int]:
+        """Build the parse cache key: (absolute path, mtime in ns, size)."""
+        st = os.stat(file_path)
+        return (os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+
+    def _cache_put(
+        self, cache: Dict[Any, Mapping[str, Any]], key: Any, result: Mapping[str, Any], size: int
+    ) -> None:
+        """Store a parse result in one of the caches, evicting the oldest entry when full."""
+        with self._cache_lock:
+            if len(cache) >= size:
+                # Evict the oldest entry (dicts keep insertion order)
+                del cache[next(iter(cache))]
+            cache[key] = result
+
+
+# Registry used inside ParserRegistry.parse_files worker processes
+_worker_registry: Optional[ParserRegistry] = None
+
+
+def _parse_in_worker(ext: str, content: str, file_name: str) -> Dict[str, Any]:
+    """Parse one document in a worker process (module level so it can be pickled).
+
+    Read-only mappings cannot be pickled, so the result goes back to the
+    parent as plain dicts and is frozen again there by _freeze_result.
+    """
+    global _worker_registry
+    if _worker_registry is None:
+        _worker_registry = ParserRegistry()
+    result = _worker_registry.parsers[ext].parse_text(content, file_name)
+    return {**result, "metadata": dict(result["metadata"])}
+
+
+def _freeze_result(result: Dict[str, Any]) -> Mapping[str, Any]:
+    """Turn a result returned by _parse_in_worker back into read-only mappings."""
+    return MappingProxyType({**result, "metadata": MappingProxyType(result["metadata"])})
+
+
+def _with_file_name(result: Mapping[str, Any], file_name: str) -> Mapping[str, Any]:
+    """Reuse a cached result for the same content found under another file name."""
+    if result["file_name"] == file_name:
+        return result
+    return MappingProxyType({**result, "file_name": file_name})
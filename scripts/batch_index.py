@@ -6,6 +6,12 @@ from pathlib import Path
 from typing import List
 import httpx
 
+try:
+    from scripts.defaults import DEFAULT_EXTENSIONS
+except ImportError:
+    # Running as a plain script: scripts/ itself is on sys.path
+    from defaults import DEFAULT_EXTENSIONS
+
 
 def find_files(directory: str, extensions: List[str]) -> List[str]:
     """
@@ -70,7 +76,7 @@ def main() -> None:
         sys.exit(1)
 
     # Find supported files
-    extensions = [".md", ".py"]
+    extensions = list(DEFAULT_EXTENSIONS)
     file_paths = find_files(directory, extensions)
 
     if not file_paths:
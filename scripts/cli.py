@@ -4,9 +4,15 @@
 import argparse
 import json
 import os
+import shlex
 import sys
-import httpx
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import httpx
 
 # Import config functions
 try:
@@ -19,57 +25,302 @@ except ImportError:
     get_current_project = None
     set_current_project = None
 
+try:
+    from scripts.defaults import DEFAULT_EXTENSIONS
+except ImportError:
+    # Running as a plain script: scripts/ itself is on sys.path
+    from defaults import DEFAULT_EXTENSIONS
 
-def main() -> int:
-    parser = argparse.ArgumentParser(
-        description="Codexa - Local-first AI knowledge vault",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  codexa s "how to use encryption"          # Search with AI answer
-  codexa i file.md                          # Index a file
-  codexa i-dir ./docs                       # Index directory
-  codexa project create myproject           # Create a new project
-  codexa project list                       # List all projects
-  codexa llm list                           # List available Ollama models
-  codexa llm set llama3.2                   # Set LLM model
-        """
-    )
-    parser.add_argument(
-        "--base-url",
-        default=os.getenv("CODEXA_API_URL", "http://localhost:8000"),
-        help="API base URL (default: CODEXA_API_URL env var or http://localhost:8000)"
-    )
-    parser.add_argument(
-        "--api-key",
-        default=os.getenv("CODEXA_API_KEY"),
-        help="X-API-Key header value (default: CODEXA_API_KEY env var)"
+# Prefer orjson for decoding responses and pretty-printing; fall back to stdlib json
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumpb = orjson.dumps
+
+    def _dumpb_pretty(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    def _dumps(obj: Any) -> str:
+        return _dumpb_pretty(obj).decode()
+
+except ImportError:
+    _loads = json.loads
+
+    def _dumpb(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2)
+
+    def _dumpb_pretty(obj: Any) -> bytes:
+        return _dumps(obj).encode()
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# API client settings shared by the sync and async clients: fail fast when the
+# server is down (short connect timeout, in seconds), retrying in the transport
+_REQUEST_TIMEOUT = 30.0
+_CONNECT_TIMEOUT = 3.0
+_CONNECT_RETRIES = 2
+
+
+# str.translate table used to flatten content previews onto one line
+_NEWLINE_TO_SPACE = {10: 32}
+
+
+def _collect_files(args: argparse.Namespace) -> List[str]:
+    """Combine positional file arguments with paths read from --files-from."""
+    files = list(args.files)
+    if args.files_from is not None:
+        # Reading from a file sidesteps the OS limit on command-line length
+        if args.files_from == "-":
+            files.extend(line.strip() for line in sys.stdin if line.strip())
+        else:
+            with open(args.files_from, "r", encoding="utf-8") as f:
+                files.extend(line.strip() for line in f if line.strip())
+    return files
+
+
+def _abspath_batch(paths: List[str]) -> List[str]:
+    """Resolve paths against the working directory, calling os.getcwd() only once."""
+    cwd = os.getcwd()
+    return [p if os.path.isabs(p) else os.path.normpath(os.path.join(cwd, p)) for p in paths]
+
+
+def _parse_key_values(items: Optional[List[str]]) -> Dict[str, str]:
+    """Turn KEY=VALUE arguments into a dict, ignoring items without '='."""
+    return {k: v for k, sep, v in (item.partition("=") for item in items or ()) if sep}
+
+
+def _format_search_result(idx: int, result: Dict[str, Any]) -> str:
+    """Format one search result for display."""
+    score = result.get("score", 0.0)
+    file_path = result.get("file_path", "Unknown")
+    file_type = result.get("file_type", "")
+    content = result.get("content", "")
+
+    # Truncate content for display
+    max_content_len = 200
+    content_preview = content[:max_content_len]
+    if len(content) > max_content_len:
+        content_preview += "..."
+
+    score_pct = f"{round(score * 100)}%"
+    return (
+        f"  [{idx}] {file_path} ({file_type}) - {score_pct}\n"
+        f"      {content_preview.translate(_NEWLINE_TO_SPACE)}\n\n"
     )
 
-    sub = parser.add_subparsers(dest="cmd", required=True)
 
-    # Short aliases for common commands
+@contextmanager
+def _search_stream(
+    client: "httpx.Client", payload: Dict[str, Any]
+) -> Iterator[Tuple["httpx.Response", Iterator[Dict[str, Any]]]]:
+    """
+    POST a search and iterate over its results while the body streams in.
+
+    Results are decoded incrementally with ijson when it is installed;
+    otherwise the body is read and decoded in one go. On an error status the
+    body is read (available as response.content) and no results are yielded.
+
+    Yields:
+        Tuple of the response and an iterator over result dicts
+    """
+    with client.stream("POST", "/search", content=_dumpb(payload), headers=_JSON_HEADERS) as resp:
+        if resp.status_code != 200:
+            resp.read()
+            yield resp, iter(())
+            return
+        ijson = _import_ijson()
+        if ijson is None:
+            resp.read()
+            yield resp, iter(_loads(resp.content).get("results", []))
+        else:
+            yield resp, _iter_streamed_results(resp, ijson)
+
+
+@lru_cache(maxsize=1)
+def _import_ijson() -> Any:
+    """Import ijson for incremental decoding, or return None when it isn't installed.
+
+    Imported on first use so commands that never stream a search don't pay for it.
+    """
+    try:
+        import ijson
+    except ImportError:
+        return None
+    return ijson
+
+
+def _iter_streamed_results(resp: "httpx.Response", ijson: Any) -> Iterator[Dict[str, Any]]:
+    """Decode the "results" array of a streaming search response item by item."""
+    decoded: List[Dict[str, Any]] = ijson.sendable_list()
+    coro = ijson.items_coro(decoded, "results.item", use_float=True)
+    for chunk in resp.iter_bytes():
+        coro.send(chunk)
+        yield from decoded
+        del decoded[:]
+    coro.close()
+    yield from decoded
+
+
+def _auth_headers(args: argparse.Namespace) -> Dict[str, str]:
+    """Headers carrying the API key, if one was given."""
+    return {"X-API-Key": args.api_key} if args.api_key else {}
+
+
+def _send_json(client: "httpx.Client", method: str, path: str, payload: Any) -> "httpx.Response":
+    """Send a JSON request body encoded up front (httpx would otherwise use stdlib json)."""
+    return client.request(method, path, content=_dumpb(payload), headers=_JSON_HEADERS)
+
+
+def _write_bytes(data: bytes) -> None:
+    """Write pre-encoded UTF-8 output to stdout in one call."""
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        # stdout replaced by a text-only stream (e.g. redirect_stdout)
+        sys.stdout.write(data.decode("utf-8", "replace"))
+        return
+    # Anything already print()ed must reach the buffer first
+    sys.stdout.flush()
+    buffer.write(data)
+
+
+def _print_error(resp: "httpx.Response", raw: bool = False) -> None:
+    """Print an error status and its body as a single write.
+
+    JSON bodies are pretty-printed straight to bytes; anything else is
+    written as received. With ``raw`` set, stdout gets only what
+    :func:`_print_raw` would print and the status line goes to stderr.
+    """
+    if raw:
+        print(f"❌ Error: {resp.status_code}", file=sys.stderr)
+        _print_raw(resp)
+        return
+    out = f"❌ Error: {resp.status_code}\n".encode()
+    if resp.headers.get("content-type", "").startswith("application/json"):
+        out += _dumpb_pretty(_loads(resp.content)) + b"\n"
+    elif resp.content:
+        out += resp.content + b"\n"
+    _write_bytes(out)
+
+
+def _print_raw(resp: "httpx.Response") -> None:
+    """Print a response body exactly as the server sent it (compact JSON), or its status."""
+    _write_bytes(resp.content + b"\n" if resp.content else f"{resp.status_code}\n".encode())
+
+
+@lru_cache(maxsize=1)
+def _resolve_ollama_url() -> str:
+    """Resolve the Ollama base URL from the config file, falling back to OLLAMA_BASE_URL."""
+    config = get_llm_config() if get_llm_config else {}
+    return config.get("base_url") or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+
+
+async def _probe_llm_status(
+    base_url: str, ollama_url: str, headers: Dict[str, str]
+) -> List[Union["httpx.Response", BaseException]]:
+    """Query the Codexa API and Ollama concurrently; failures are returned, not raised."""
+    import asyncio
+    import httpx
+
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(_REQUEST_TIMEOUT, connect=_CONNECT_TIMEOUT),
+        transport=httpx.AsyncHTTPTransport(retries=_CONNECT_RETRIES),
+    ) as client:
+        return await asyncio.gather(
+            client.get(f"{base_url.rstrip('/')}/config/llm", headers=headers),
+            client.get(f"{ollama_url.rstrip('/')}/api/tags", timeout=2.0),
+            return_exceptions=True,
+        )
+
+
+def _version() -> str:
+    """Look up the Codexa version; only --version needs it, so it is not done at import."""
+    try:
+        from core import __version__
+
+        return __version__
+    except ImportError:
+        # Running as a plain script: ask the installed distribution instead
+        from importlib.metadata import PackageNotFoundError, version
+
+        try:
+            return version("codexa")
+        except PackageNotFoundError:
+            return "unknown"
+
+
+class _VersionAction(argparse.Action):
+    """Like action="version", but resolves the version string only when used."""
+
+    def __init__(self, option_strings: List[str], dest: str = argparse.SUPPRESS, **kwargs: Any) -> None:
+        super().__init__(
+            option_strings,
+            dest,
+            default=argparse.SUPPRESS,
+            nargs=0,
+            help="show program's version number and exit",
+        )
+
+    def __call__(
+        self,
+        parser: argparse.ArgumentParser,
+        namespace: argparse.Namespace,
+        values: Any,
+        option_string: Optional[str] = None,
+    ) -> None:
+        print(f"{parser.prog} {_version()}")
+        parser.exit()
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for options that must be >= 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value}")
+    return number
+
+
+def _add_index_parser(sub: Any) -> None:
     idx = sub.add_parser("index", aliases=["i"], help="Index files")
-    idx.add_argument("files", nargs="+", help="File paths to index")
+    idx.add_argument("files", nargs="*", help="File paths to index")
+    idx.add_argument(
+        "--files-from",
+        metavar="PATH",
+        help="Also index paths listed in this file, one per line ('-' for stdin)",
+    )
     idx.add_argument("-e", "--encrypt", action="store_true", help="Encrypt content")
     idx.add_argument("-p", "--project", default=None, help="Project/workspace name (auto-detected if not set)")
 
+
+def _add_index_dir_parser(sub: Any) -> None:
     idxd = sub.add_parser("index-dir", aliases=["i-dir", "dir"], help="Index a directory")
     idxd.add_argument("directory_path", help="Directory path to index")
     idxd.add_argument(
         "-e", "--extensions",
         nargs="*",
-        default=[".md", ".py"],
-        help="File extensions (default: .md .py)",
+        default=list(DEFAULT_EXTENSIONS),
+        help=f"File extensions (default: {' '.join(DEFAULT_EXTENSIONS)})",
     )
     idxd.add_argument("--no-recursive", action="store_true", help="Don't search recursively")
     idxd.add_argument("--encrypt", action="store_true", help="Encrypt content")
     idxd.add_argument("-p", "--project", default=None, help="Project/workspace name (auto-detected if not set)")
 
+
+def _add_reindex_parser(sub: Any) -> None:
     reidx = sub.add_parser("reindex", aliases=["ri"], help="Reindex files")
-    reidx.add_argument("files", nargs="+", help="File paths to reindex")
+    reidx.add_argument("files", nargs="*", help="File paths to reindex")
+    reidx.add_argument(
+        "--files-from",
+        metavar="PATH",
+        help="Also reindex paths listed in this file, one per line ('-' for stdin)",
+    )
     reidx.add_argument("-e", "--encrypt", action="store_true", help="Encrypt content")
 
+
+def _add_search_parser(sub: Any) -> None:
     sea = sub.add_parser("search", aliases=["s"], help="Search documents (AI answers enabled by default)")
     sea.add_argument("query", nargs="?", help="Search query")
     sea.add_argument("-k", "--top-k", type=int, default=10, help="Number of results")
@@ -92,6 +343,8 @@ Examples:
         help="Disable AI answer generation",
     )
 
+
+def _add_delete_parser(sub: Any) -> None:
     dele = sub.add_parser("delete", aliases=["d", "del"], help="Delete documents")
     dele_sub = dele.add_subparsers(dest="delete_type", required=True)
     
@@ -105,14 +358,26 @@ Examples:
     dele_dir.add_argument("directory_path", help="Directory path to delete")
     dele_dir.add_argument("--no-recursive", action="store_true", help="Don't delete files in subdirectories")
 
+
+def _add_index_web_parser(sub: Any) -> None:
     web = sub.add_parser("index-web", aliases=["web", "w"], help="Index web content")
     web.add_argument("--url", required=True, help="Source URL")
     web.add_argument("--title", required=True, help="Page title")
-    web.add_argument("--content", required=True, help="Markdown content")
+    web_content = web.add_mutually_exclusive_group(required=True)
+    web_content.add_argument("--content", help="Markdown content")
+    web_content.add_argument(
+        "--content-file",
+        type=Path,
+        metavar="PATH",
+        help="Read Markdown content from a file ('-' for stdin) instead of the command line",
+    )
+    web.add_argument("--source", default="web", help="Source identifier (default: web)")
     web.add_argument("--tag", action="append", default=[], help="Add a tag (repeatable)")
     web.add_argument("--meta", action="append", metavar="KEY=VALUE", default=[], help="Metadata (repeatable)")
     web.add_argument("-e", "--encrypt", action="store_true", help="Encrypt content")
 
+
+def _add_llm_parser(sub: Any) -> None:
     # LLM configuration commands
     llm_parser = sub.add_parser("llm", help="Configure Ollama LLM")
     llm_sub = llm_parser.add_subparsers(dest="llm_cmd", required=True)
@@ -121,6 +386,11 @@ Examples:
     
     llm_set = llm_sub.add_parser("set", aliases=["use"], help="Set LLM model and context window")
     llm_set.add_argument("model", help="Model name (e.g., llama3.2)")
+    llm_set.add_argument(
+        "-q", "--quiet",
+        action="store_true",
+        help="Don't list available models first (also skipped when the model has a :tag)",
+    )
     llm_set.add_argument(
         "--context-window",
         type=int,
@@ -142,6 +412,8 @@ Examples:
         help="Context window size to test (default: current config)"
     )
 
+
+def _add_project_parser(sub: Any) -> None:
     # Project management commands
     proj_parser = sub.add_parser("project", aliases=["proj", "p"], help="Manage project/workspace")
     proj_sub = proj_parser.add_subparsers(dest="proj_cmd", required=True)
@@ -156,459 +428,702 @@ Examples:
     
     proj_list = proj_sub.add_parser("list", aliases=["ls"], help="List all projects (from indexed documents)")
 
-    args = parser.parse_args()
-    headers = {}
-    if args.api_key:
-        headers["X-API-Key"] = args.api_key
-
-    with httpx.Client(base_url=args.base_url, headers=headers, timeout=30.0) as client:
-        if args.cmd in ["index", "i"]:
-            abs_files = [os.path.abspath(f) for f in args.files]
-            payload = {"file_paths": abs_files, "encrypt": bool(args.encrypt)}
-            if args.project is not None:
-                payload["project"] = args.project
-            resp = client.post("/index", json=payload)
+
+# Global options that take a value, skipped when sniffing for the subcommand
+_GLOBAL_VALUE_OPTIONS = ("--base-url", "--api-key", "--batch-size")
+# Namespace attributes of the global options, carried into each --serve line
+_GLOBAL_OPTION_DESTS = ("base_url", "api_key", "raw", "batch_size")
+
+
+def _build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    Build the argument parser for the CLI.
+
+    Args:
+        command: Only add the subparser for this command; all subparsers when None
+
+    Returns:
+        Configured argument parser
+    """
+    parser = argparse.ArgumentParser(
+        description="Codexa - Local-first AI knowledge vault",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  codexa s "how to use encryption"          # Search with AI answer
+  codexa i file.md                          # Index a file
+  codexa i-dir ./docs                       # Index directory
+  codexa project create myproject           # Create a new project
+  codexa project list                       # List all projects
+  codexa llm list                           # List available Ollama models
+  codexa llm set llama3.2                   # Set LLM model
+        """
+    )
+    parser.add_argument("--version", action=_VersionAction)
+    parser.add_argument(
+        "--base-url",
+        default=os.getenv("CODEXA_API_URL", "http://localhost:8000"),
+        help="API base URL (default: CODEXA_API_URL env var or http://localhost:8000)"
+    )
+    parser.add_argument(
+        "--api-key",
+        default=os.getenv("CODEXA_API_KEY"),
+        help="X-API-Key header value (default: CODEXA_API_KEY env var)"
+    )
+    parser.add_argument(
+        "--persistent",
+        "--serve",
+        action="store_true",
+        help="Read commands from stdin, one per line, reusing one connection (global options apply to all)"
+    )
+    parser.add_argument(
+        "--raw",
+        action="store_true",
+        help="Print API responses as compact JSON, one per line, instead of formatted output"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=_positive_int,
+        default=200,
+        help="Maximum files sent per index/reindex request (default: 200, the server's CODEXA_MAX_FILES default)"
+    )
+
+    # Not required at the argparse level: --persistent runs without a command
+    sub = parser.add_subparsers(dest="cmd")
+
+    if command is not None:
+        _SUBPARSER_BUILDERS[command](sub)
+    else:
+        for _, builder, _ in _COMMANDS:
+            builder(sub)
+
+    return parser
+
+
+def _sniff_command(argv: List[str]) -> Optional[str]:
+    """Return the subcommand token in argv, or None if help was requested before it."""
+    tokens = iter(argv)
+    for token in tokens:
+        if token in ("-h", "--help"):
+            return None
+        if token in _GLOBAL_VALUE_OPTIONS:
+            next(tokens, None)
+        elif not token.startswith("-"):
+            return token
+    return None
+
+
+# Parsers are cached per command so repeated main() calls don't rebuild them
+_PARSERS: Dict[Optional[str], argparse.ArgumentParser] = {}
+
+
+def _get_parser(argv: List[str]) -> argparse.ArgumentParser:
+    """Get a parser containing only the subcommand named in argv (all of them for help/errors)."""
+    command = _sniff_command(argv)
+    if command not in _SUBPARSER_BUILDERS:
+        command = None
+    parser = _PARSERS.get(command)
+    if parser is None:
+        parser = _PARSERS[command] = _build_parser(command)
+    return parser
+
+
+def _run_project_local(args: argparse.Namespace) -> int:
+    """Handle project commands that only touch the local config file."""
+    if args.proj_cmd in ["create", "new", "add"]:
+        project_name = args.name
+        if set_current_project:
+            set_current_project(project_name)
+            print(f"✅ Project '{project_name}' created and set as current")
+            print(f"💡 Documents indexed without --project will use this project")
+        else:
+            print(f"✅ Project '{project_name}' created (config module not available)")
+            print(f"💡 Use --project flag when indexing: codexa i --project {project_name} <files>")
+            
+    elif args.proj_cmd == "set":
+        if set_current_project:
+            set_current_project(args.name)
+            print(f"✅ Current project set to: {args.name}")
+            print(f"💡 Documents indexed without --project will use this project")
+        else:
+            print("❌ Config module not available")
+            
+    elif args.proj_cmd in ["get", "current"]:
+        if get_current_project:
+            project = get_current_project()
+            print(f"📦 Current project: {project}")
+            print(f"💡 Documents indexed without --project will use this project")
+        else:
+            print("❌ Config module not available")
+
+    return 0
+
+
+def _cmd_index(args: argparse.Namespace, client: "httpx.Client") -> int:
+    """Index files, in batches of --batch-size."""
+    abs_files = _abspath_batch(_collect_files(args))
+    if not abs_files:
+        print("❌ Error: No files given. Use: codexa i <files> or --files-from PATH")
+        return 1
+    indexed_count = failed_count = 0
+    # All files go in one request up to --batch-size (one embedding pass per batch)
+    for start in range(0, len(abs_files), args.batch_size):
+        payload = {"file_paths": abs_files[start:start + args.batch_size], "encrypt": bool(args.encrypt)}
+        if args.project is not None:
+            payload["project"] = args.project
+        resp = _send_json(client, "POST", "/index", payload)
+        # The server answers 201 Created; any 2xx means the batch went through
+        if not resp.is_success:
+            _print_error(resp, args.raw)
+            break
+        if args.raw:
+            _print_raw(resp)
+            continue
+        data = _loads(resp.content)
+        indexed_count += data.get("indexed_count", 0)
+        failed_count += data.get("failed_count", 0)
+    else:
+        if args.raw:
+            return 0
+        print(f"✅ Indexed {indexed_count} file(s)")
+        if failed_count > 0:
+            print(f"⚠️  {failed_count} file(s) failed")
+    return 0
+
+
+def _cmd_index_dir(args: argparse.Namespace, client: "httpx.Client") -> int:
+    """Index a directory on the server side."""
+    abs_dir = os.path.abspath(args.directory_path)
+    payload = {
+        "directory_path": abs_dir,
+        "extensions": args.extensions,
+        "recursive": not args.no_recursive,
+        "encrypt": bool(args.encrypt),
+    }
+    if args.project is not None:
+        payload["project"] = args.project
+    resp = _send_json(client, "POST", "/index/directory", payload)
+    if resp.is_success and args.raw:
+        _print_raw(resp)
+    elif resp.is_success:
+        data = _loads(resp.content)
+        print(f"✅ Indexed {data.get('indexed_count', 0)} file(s)")
+        if data.get("failed_count", 0) > 0:
+            print(f"⚠️  {data.get('failed_count')} file(s) failed")
+    else:
+        _print_error(resp, args.raw)
+    return 0
+
+
+def _cmd_reindex(args: argparse.Namespace, client: "httpx.Client") -> int:
+    """Reindex files, in batches of --batch-size."""
+    abs_files = _abspath_batch(_collect_files(args))
+    if not abs_files:
+        print("❌ Error: No files given. Use: codexa ri <files> or --files-from PATH")
+        return 1
+    indexed_count = failed_count = 0
+    for start in range(0, len(abs_files), args.batch_size):
+        payload = {"file_paths": abs_files[start:start + args.batch_size], "encrypt": bool(args.encrypt)}
+        resp = _send_json(client, "POST", "/reindex", payload)
+        if not resp.is_success:
+            _print_error(resp, args.raw)
+            break
+        if args.raw:
+            _print_raw(resp)
+            continue
+        data = _loads(resp.content)
+        indexed_count += data.get("indexed_count", 0)
+        failed_count += data.get("failed_count", 0)
+    else:
+        if args.raw:
+            return 0
+        print(f"✅ Reindexed {indexed_count} file(s)")
+        if failed_count > 0:
+            print(f"⚠️  {failed_count} file(s) failed")
+    return 0
+
+
+def _cmd_search(args: argparse.Namespace, client: "httpx.Client") -> int:
+    """Search documents and print the AI answer and results."""
+    query = args.query
+    if not query:
+        print("❌ Error: Query required. Use: codexa s 'your query'")
+        return 1
+        
+    filters = _parse_key_values(args.filter)
+    payload = {
+        "query": query,
+        "top_k": args.top_k,
+        "offset": args.offset,
+        "generate_answer": not args.no_answer,  # Default to True
+    }
+    if args.file_type:
+        payload["file_type"] = args.file_type
+    if filters:
+        payload["filters"] = filters
+    # Handle project filter (mandatory - always uses a project)
+    if args.project is not None:
+        payload["project"] = args.project
+    # If not specified, API will use current project from config (always returns a project)
+    if args.raw:
+        # Pass the server's JSON through untouched
+        resp = _send_json(client, "POST", "/search", payload)
+        if resp.status_code == 200:
+            _print_raw(resp)
+        else:
+            _print_error(resp, args.raw)
+        return 0
+
+    answer = None
+    if args.no_answer:
+        # Nothing to show ahead of the results, so decode them as they stream in
+        with _search_stream(client, payload) as (resp, results):
+            lines = [_format_search_result(idx, result) for idx, result in enumerate(results, 1)]
+    else:
+        resp = _send_json(client, "POST", "/search", payload)
+        if resp.status_code == 200:
+            data = _loads(resp.content)
+            answer = data.get("answer")
+            lines = [_format_search_result(idx, result) for idx, result in enumerate(data.get("results", []), 1)]
+    
+    if resp.status_code == 200:
+        # Show answer first if generated
+        if answer:
+            print(f"\n🤖 AI Answer:\n")
+            print("─" * 80)
+            # Word wrap the answer
+            words = answer.split()
+            line = ""
+            for word in words:
+                if len(line + word) > 76:
+                    print(f"  {line}")
+                    line = word + " "
+                else:
+                    line += word + " "
+            if line:
+                print(f"  {line}")
+            print("─" * 80)
+            print()
+        
+        if not lines:
+            print(f"📭 No results found for: '{query}'")
+        else:
+            print(f"🔍 Found {len(lines)} result(s):\n")
+            # Write all results at once instead of several prints per result
+            sys.stdout.write("".join(lines))
+    else:
+        _print_error(resp, args.raw)
+    return 0
+
+
+def _cmd_delete(args: argparse.Namespace, client: "httpx.Client") -> int:
+    """Delete documents by ID, file or directory."""
+    if args.delete_type == "id":
+        resp = client.delete(f"/documents/{args.document_id}")
+        if resp.status_code == 204 and args.raw:
+            _print_raw(resp)
+        elif resp.status_code == 204:
+            print(f"✅ Deleted document {args.document_id[:8]}...")
+        else:
+            _print_error(resp, args.raw)
+    elif args.delete_type in ["file", "f"]:
+        abs_file_path = os.path.abspath(args.file_path)
+        resp = _send_json(client, "DELETE", "/documents/file", {"file_path": abs_file_path})
+        if resp.status_code == 200 and args.raw:
+            _print_raw(resp)
+        elif resp.status_code == 200:
+            data = _loads(resp.content)
+            print(f"✅ {data.get('message', 'Deleted')}")
+        else:
+            _print_error(resp, args.raw)
+    elif args.delete_type in ["dir", "directory", "d"]:
+        abs_dir_path = os.path.abspath(args.directory_path)
+        resp = _send_json(
+            client,
+            "DELETE",
+            "/documents/directory",
+            {"directory_path": abs_dir_path, "recursive": not args.no_recursive},
+        )
+        if resp.status_code == 200 and args.raw:
+            _print_raw(resp)
+        elif resp.status_code == 200:
+            data = _loads(resp.content)
+            print(f"✅ {data.get('message', 'Deleted')}")
+        else:
+            _print_error(resp, args.raw)
+    return 0
+
+
+def _cmd_index_web(args: argparse.Namespace, client: "httpx.Client") -> int:
+    """Index web content."""
+    metadata = _parse_key_values(args.meta)
+    if args.content_file is not None:
+        # Avoids the argv length limit for large pages
+        if str(args.content_file) == "-":
+            content = sys.stdin.read()
+        else:
+            content = args.content_file.read_text(encoding="utf-8")
+    else:
+        content = args.content
+    payload = {
+        "url": args.url,
+        "title": args.title,
+        "content": content,
+        "tags": args.tag,
+        "source": args.source,
+        "metadata": metadata,
+        "encrypt": bool(args.encrypt),
+    }
+    resp = _send_json(client, "POST", "/index/web", payload)
+    if resp.status_code == 201 and args.raw:
+        _print_raw(resp)
+    elif resp.status_code == 201:
+        data = _loads(resp.content)
+        print(f"✅ Indexed web content: {data.get('document_id', 'N/A')[:8]}...")
+    else:
+        _print_error(resp, args.raw)
+    return 0
+
+
+def _cmd_llm(args: argparse.Namespace, client: "httpx.Client") -> int:
+    """Configure and inspect the Ollama LLM."""
+    import httpx
+
+    if args.llm_cmd in ["list", "ls"]:
+        # Call Ollama API directly - use config if available
+        ollama_url = _resolve_ollama_url()
+        try:
+            with httpx.Client(base_url=ollama_url, timeout=5.0) as ollama_client:
+                resp = ollama_client.get("/api/tags")
             if resp.status_code == 200:
-                data = resp.json()
-                print(f"✅ Indexed {data.get('indexed_count', 0)} file(s)")
-                if data.get("failed_count", 0) > 0:
-                    print(f"⚠️  {data.get('failed_count')} file(s) failed")
+                models = _loads(resp.content).get("models", [])
+                if models:
+                    print("📦 Available Ollama models:")
+                    for model in models:
+                        name = model.get("name", "")
+                        size = model.get("size", 0)
+                        size_gb = size / (1024**3) if size else 0
+                        print(f"  • {name} ({size_gb:.1f} GB)")
+                else:
+                    print("📦 No models installed. Run: ollama pull llama3.2")
             else:
-                print(f"❌ Error: {resp.status_code}")
-                print(json.dumps(resp.json(), indent=2))
-                
-        elif args.cmd in ["index-dir", "i-dir", "dir"]:
-            abs_dir = os.path.abspath(args.directory_path)
-            payload = {
-                "directory_path": abs_dir,
-                "extensions": args.extensions,
-                "recursive": not args.no_recursive,
-                "encrypt": bool(args.encrypt),
-            }
-            if args.project is not None:
-                payload["project"] = args.project
-            resp = client.post("/index/directory", json=payload)
+                print(f"❌ Error connecting to Ollama: {resp.status_code}")
+                print("Make sure Ollama is running: ollama serve")
+        except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+            # InvalidURL (a malformed Ollama URL) is not an HTTPError subclass
+            print(f"❌ Error: {e}")
+            print("Make sure Ollama is running: ollama serve")
+            
+    elif args.llm_cmd in ["set", "use"]:
+        # Set via config file and API
+        model = args.model
+        
+        # First, show available models to help user (skip when the exact tag is known)
+        if not args.quiet and ":" not in model:
+            try:
+                resp = client.get("/config/llm/models")
+                if resp.status_code == 200:
+                    models_data = _loads(resp.content)
+                    available = models_data.get("models", [])
+                    if available:
+                        print("📦 Available models:")
+                        for m in available[:10]:  # Show first 10
+                            name = m.get("name", "")
+                            size = m.get("size_gb", 0)
+                            marker = " ← " if name == model or name.startswith(f"{model}:") else ""
+                            print(f"  {marker}• {name} ({size} GB)")
+                        if len(available) > 10:
+                            print(f"  ... and {len(available) - 10} more")
+                        print()
+            except (httpx.HTTPError, ValueError):
+                pass  # Silently fail - just continue
+        
+        try:
+            # Prepare payload
+            payload = {"model": model}
+            if args.context_window:
+                payload["context_window"] = args.context_window
+            
+            # Save to config file
+            if set_llm_config:
+                set_llm_config(model, None, args.context_window)
+                print(f"✅ Saved model '{model}' to config file")
+                if args.context_window:
+                    print(f"✅ Saved context window: {args.context_window} tokens")
+            else:
+                print(f"⚠️  Config module not available, using API only")
+            
+            # Update via API if server is running
+            try:
+                resp = _send_json(client, "POST", "/config/llm", payload)
+                if resp.status_code == 200:
+                    data = _loads(resp.content)
+                    resolved_model = data.get("model", model)
+                    if data.get("available"):
+                        if resolved_model != model:
+                            print(f"✅ LLM updated and active: {resolved_model} (resolved from {model})")
+                        else:
+                            print(f"✅ LLM updated and active: {model}")
+                    else:
+                        print(f"⚠️  LLM updated but not available. Make sure Ollama is running: ollama serve")
+                        if resolved_model != model:
+                            print(f"   Model resolved to: {resolved_model}")
+                        else:
+                            print(f"   Install model: ollama pull {model}")
+                else:
+                    print(f"⚠️  Config saved, but API update failed: {resp.status_code}")
+                    print(f"   Restart the API server to apply changes")
+            except httpx.ConnectError:
+                print(f"✅ Config saved to file")
+                print(f"⚠️  API server not running - restart it to apply changes")
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"✅ Config saved to file")
+                print(f"⚠️  API update failed: {e}")
+            
+            print(f"\n💡 Make sure the model is installed: ollama pull {model}")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+        
+    elif args.llm_cmd in ["status", "info"]:
+        # Check LLM status via API and config file
+        try:
+            config = get_llm_config() if get_llm_config else {}
+            # Get from config file
+            if get_llm_config:
+                config_path = get_config_path()
+                print(f"📁 Config file: {config_path}")
+                print(f"📦 Model: {config['model']}")
+                print(f"🔗 Base URL: {config['base_url']}")
+
+            # Probe the API and Ollama concurrently
+            import asyncio
+
+            ollama_url = _resolve_ollama_url()
+            resp, ollama_resp = asyncio.run(_probe_llm_status(args.base_url, ollama_url, _auth_headers(args)))
+            if isinstance(resp, BaseException):
+                raise resp
+
+            # Check API
             if resp.status_code == 200:
-                data = resp.json()
-                print(f"✅ Indexed {data.get('indexed_count', 0)} file(s)")
-                if data.get("failed_count", 0) > 0:
-                    print(f"⚠️  {data.get('failed_count')} file(s) failed")
+                data = _loads(resp.content)
+                api_model = data.get('model', 'N/A')
+                config_model = config.get('model', 'N/A') if get_llm_config else 'N/A'
+                print(f"\n🌐 API Status:")
+                print(f"   Model: {api_model}")
+                print(f"   Context Window: {data.get('context_window', 4096)} tokens")
+                if api_model != config_model and config_model != 'N/A':
+                    print(f"   (Resolved from: {config_model})")
+                print(f"   Base URL: {data.get('base_url', 'N/A')}")
+                if data.get("available"):
+                    print(f"   Status: ✅ Available")
+                else:
+                    print(f"   Status: ⚠️  Not available")
+            else:
+                print(f"\n⚠️  API not responding: {resp.status_code}")
+
+            # Check Ollama directly
+            if isinstance(ollama_resp, BaseException):
+                print(f"\n🦙 Ollama: ❌ Connection failed - {ollama_resp}")
+                print(f"   Make sure Ollama is running: ollama serve")
+            elif ollama_resp.status_code == 200:
+                print(f"\n🦙 Ollama: ✅ Running at {ollama_url}")
             else:
-                print(f"❌ Error: {resp.status_code}")
-                print(json.dumps(resp.json(), indent=2))
-                
-        elif args.cmd in ["reindex", "ri"]:
-            abs_files = [os.path.abspath(f) for f in args.files]
-            resp = client.post("/reindex", json={"file_paths": abs_files, "encrypt": bool(args.encrypt)})
+                print(f"\n🦙 Ollama: ⚠️  Not responding at {ollama_url}")
+        except httpx.ConnectError:
+            print("❌ API server not running")
+            if get_llm_config:
+                print(f"📦 Config file shows: {config['model']} at {config['base_url']}")
+                print(f"📏 Context Window: {config.get('context_window', 4096)} tokens")
+                print(f"⚠️  Note: Ensure Ollama's num_ctx is set to {config.get('context_window', 4096)}")
+                print(f"   Valid options: 4096, 8192, 16384, 32768, 65536, 131072, 262144")
+                print(f"   Configure via: OLLAMA_NUM_CTX={config.get('context_window', 4096)}")
+        except Exception as e:
+            print(f"⚠️  Error: {e}")
+            
+    elif args.llm_cmd == "test":
+        # Test LLM by making a search request
+        try:
+            resp = _send_json(client, "POST", "/search", {"query": "test", "top_k": 1, "generate_answer": True})
             if resp.status_code == 200:
-                data = resp.json()
-                print(f"✅ Reindexed {data.get('indexed_count', 0)} file(s)")
+                data = _loads(resp.content)
+                if data.get("answer"):
+                    print("✅ LLM connection test passed!")
+                    print(f"   Answer preview: {data['answer'][:100]}...")
+                    if "answer_stats" in data:
+                        stats = data["answer_stats"]
+                        print(f"   Context usage: {stats.get('context_usage_percent', 0):.1f}%")
+                        print(f"   Total tokens: {stats.get('total_tokens', 0):,}")
+                else:
+                    print("⚠️  LLM responded but no answer generated")
             else:
-                print(f"❌ Error: {resp.status_code}")
-                print(json.dumps(resp.json(), indent=2))
-                
-        elif args.cmd in ["search", "s"]:
-            query = args.query
-            if not query:
-                print("❌ Error: Query required. Use: codexa s 'your query'")
-                return 1
-                
-            filters = {}
-            if args.filter:
-                for kv in args.filter:
-                    if "=" in kv:
-                        k, v = kv.split("=", 1)
-                        filters[k] = v
+                print(f"❌ Test failed: {resp.status_code}")
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+    
+    elif args.llm_cmd in ["test-context", "test-ctx"]:
+        # Test context window configuration
+        try:
+            config = get_llm_config() if get_llm_config else {}
             payload = {
-                "query": query,
-                "top_k": args.top_k,
-                "offset": args.offset,
-                "generate_answer": not args.no_answer,  # Default to True
+                "model": config.get("model", "llama3.2"),
+                "base_url": _resolve_ollama_url(),
             }
-            if args.file_type:
-                payload["file_type"] = args.file_type
-            if filters:
-                payload["filters"] = filters
-            # Handle project filter (mandatory - always uses a project)
-            if args.project is not None:
-                payload["project"] = args.project
-            # If not specified, API will use current project from config (always returns a project)
-            resp = client.post("/search", json=payload)
+            if args.context_window:
+                payload["context_window"] = args.context_window
             
+            resp = _send_json(client, "POST", "/config/llm/test", payload)
             if resp.status_code == 200:
-                data = resp.json()
-                results = data.get("results", [])
-                total = data.get("total_results", 0)
-                answer = data.get("answer")
-                
-                # Show answer first if generated
-                if answer:
-                    print(f"\n🤖 AI Answer:\n")
-                    print("─" * 80)
-                    # Word wrap the answer
-                    words = answer.split()
-                    line = ""
-                    for word in words:
-                        if len(line + word) > 76:
-                            print(f"  {line}")
-                            line = word + " "
+                data = _loads(resp.content)
+                if data.get("validated"):
+                    print("✅ Context window test passed!")
+                    print(f"   Model: {data.get('model')}")
+                    print(f"   Context Window: {data.get('context_window')} tokens")
+                    if data.get("detected_context_window"):
+                        if data["detected_context_window"] == data["context_window"]:
+                            print(f"   ✅ Detected Ollama: {data['detected_context_window']} (matches)")
                         else:
-                            line += word + " "
-                    if line:
-                        print(f"  {line}")
-                    print("─" * 80)
-                    print()
-                
-                if total == 0:
-                    print(f"📭 No results found for: '{query}'")
+                            print(f"   ⚠️  Detected Ollama: {data['detected_context_window']} (mismatch!)")
+                    if "test_stats" in data:
+                        stats = data["test_stats"]
+                        print(f"   Usage: {stats.get('context_usage_percent', 0):.1f}%")
+                        print(f"   Tokens: {stats.get('total_tokens', 0):,}")
                 else:
-                    print(f"🔍 Found {total} result(s):\n")
-                    for idx, result in enumerate(results, 1):
-                        score = result.get("score", 0.0)
-                        file_path = result.get("file_path", "Unknown")
-                        file_type = result.get("file_type", "")
-                        content = result.get("content", "")
-                        
-                        # Truncate content for display
-                        max_content_len = 200
-                        content_preview = content[:max_content_len]
-                        if len(content) > max_content_len:
-                            content_preview += "..."
-                        
-                        score_pct = f"{score * 100:.0f}%"
-                        print(f"  [{idx}] {file_path} ({file_type}) - {score_pct}")
-                        print(f"      {content_preview.replace(chr(10), ' ')}")
-                        print()
+                    print(f"❌ Test failed: {data.get('message', 'Unknown error')}")
             else:
-                print(f"❌ Error: {resp.status_code}")
-                print(json.dumps(resp.json(), indent=2))
-                
-        elif args.cmd in ["delete", "d", "del"]:
-            if args.delete_type == "id":
-                resp = client.delete(f"/documents/{args.document_id}")
-                if resp.status_code == 204:
-                    print(f"✅ Deleted document {args.document_id[:8]}...")
-                else:
-                    print(f"❌ Error: {resp.status_code}")
-                    if resp.status_code != 204:
-                        try:
-                            print(json.dumps(resp.json(), indent=2))
-                        except:
-                            print(resp.text)
-            elif args.delete_type in ["file", "f"]:
-                abs_file_path = os.path.abspath(args.file_path)
-                resp = client.delete("/documents/file", json={"file_path": abs_file_path})
-                if resp.status_code == 200:
-                    data = resp.json()
-                    print(f"✅ {data.get('message', 'Deleted')}")
-                else:
-                    print(f"❌ Error: {resp.status_code}")
-                    print(json.dumps(resp.json(), indent=2))
-            elif args.delete_type in ["dir", "directory", "d"]:
-                abs_dir_path = os.path.abspath(args.directory_path)
-                resp = client.delete(
-                    "/documents/directory",
-                    json={"directory_path": abs_dir_path, "recursive": not args.no_recursive}
-                )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    print(f"✅ {data.get('message', 'Deleted')}")
-                else:
-                    print(f"❌ Error: {resp.status_code}")
-                    print(json.dumps(resp.json(), indent=2))
-                
-        elif args.cmd in ["index-web", "web", "w"]:
-            metadata = {}
-            for item in args.meta:
-                if "=" in item:
-                    k, v = item.split("=", 1)
-                    metadata[k] = v
-            payload = {
-                "url": args.url,
-                "title": args.title,
-                "content": args.content,
-                "tags": args.tag,
-                "source": args.source,
-                "metadata": metadata,
-                "encrypt": bool(args.encrypt),
+                print(f"❌ API error: {resp.status_code}")
+        except Exception as e:
+            print(f"❌ Test error: {e}")
+    return 0
+
+
+def _cmd_project(args: argparse.Namespace, client: "httpx.Client") -> int:
+    """List projects found in indexed documents."""
+    # Search for all unique projects
+    try:
+        payload = {"query": "", "top_k": 1000, "generate_answer": False}
+        with _search_stream(client, payload) as (resp, results):
+            projects = {
+                m["project"]
+                for r in results
+                if isinstance(m := r.get("metadata"), dict) and m.get("project")
             }
-            resp = client.post("/index/web", json=payload)
-            if resp.status_code == 201:
-                data = resp.json()
-                print(f"✅ Indexed web content: {data.get('document_id', 'N/A')[:8]}...")
+        if resp.status_code == 200:
+            if projects:
+                print("📦 Projects found in knowledge vault:")
+                for proj in sorted(projects):
+                    current_marker = ""
+                    if get_current_project:
+                        current = get_current_project()
+                        if current == proj:
+                            current_marker = " (current)"
+                    print(f"  • {proj}{current_marker}")
             else:
-                print(f"❌ Error: {resp.status_code}")
-                print(json.dumps(resp.json(), indent=2))
-                
-        elif args.cmd == "llm":
-            if args.llm_cmd in ["list", "ls"]:
-                # Call Ollama API directly - use config if available
-                if get_llm_config:
-                    config = get_llm_config()
-                    ollama_url = config.get("base_url", "http://localhost:11434")
-                else:
-                    ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-                try:
-                    ollama_client = httpx.Client(base_url=ollama_url, timeout=5.0)
-                    resp = ollama_client.get("/api/tags")
-                    if resp.status_code == 200:
-                        models = resp.json().get("models", [])
-                        if models:
-                            print("📦 Available Ollama models:")
-                            for model in models:
-                                name = model.get("name", "")
-                                size = model.get("size", 0)
-                                size_gb = size / (1024**3) if size else 0
-                                print(f"  • {name} ({size_gb:.1f} GB)")
-                        else:
-                            print("📦 No models installed. Run: ollama pull llama3.2")
-                    else:
-                        print(f"❌ Error connecting to Ollama: {resp.status_code}")
-                        print("Make sure Ollama is running: ollama serve")
-                except Exception as e:
-                    print(f"❌ Error: {e}")
-                    print("Make sure Ollama is running: ollama serve")
-                    
-            elif args.llm_cmd in ["set", "use"]:
-                # Set via config file and API
-                model = args.model
-                
-                # First, show available models to help user
-                try:
-                    resp = client.get("/config/llm/models")
-                    if resp.status_code == 200:
-                        models_data = resp.json()
-                        available = models_data.get("models", [])
-                        if available:
-                            print("📦 Available models:")
-                            for m in available[:10]:  # Show first 10
-                                name = m.get("name", "")
-                                size = m.get("size_gb", 0)
-                                marker = " ← " if name == model or name.startswith(f"{model}:") else ""
-                                print(f"  {marker}• {name} ({size} GB)")
-                            if len(available) > 10:
-                                print(f"  ... and {len(available) - 10} more")
-                            print()
-                except Exception:
-                    pass  # Silently fail - just continue
-                
-                try:
-                    # Prepare payload
-                    payload = {"model": model}
-                    if args.context_window:
-                        payload["context_window"] = args.context_window
-                    
-                    # Save to config file
-                    if set_llm_config:
-                        set_llm_config(model, None, args.context_window)
-                        print(f"✅ Saved model '{model}' to config file")
-                        if args.context_window:
-                            print(f"✅ Saved context window: {args.context_window} tokens")
-                    else:
-                        print(f"⚠️  Config module not available, using API only")
-                    
-                    # Update via API if server is running
-                    try:
-                        resp = client.post("/config/llm", json=payload)
-                        if resp.status_code == 200:
-                            data = resp.json()
-                            resolved_model = data.get("model", model)
-                            if data.get("available"):
-                                if resolved_model != model:
-                                    print(f"✅ LLM updated and active: {resolved_model} (resolved from {model})")
-                                else:
-                                    print(f"✅ LLM updated and active: {model}")
-                            else:
-                                print(f"⚠️  LLM updated but not available. Make sure Ollama is running: ollama serve")
-                                if resolved_model != model:
-                                    print(f"   Model resolved to: {resolved_model}")
-                                else:
-                                    print(f"   Install model: ollama pull {model}")
-                        else:
-                            print(f"⚠️  Config saved, but API update failed: {resp.status_code}")
-                            print(f"   Restart the API server to apply changes")
-                    except httpx.ConnectError:
-                        print(f"✅ Config saved to file")
-                        print(f"⚠️  API server not running - restart it to apply changes")
-                    except Exception as e:
-                        print(f"✅ Config saved to file")
-                        print(f"⚠️  API update failed: {e}")
-                    
-                    print(f"\n💡 Make sure the model is installed: ollama pull {model}")
-                except Exception as e:
-                    print(f"❌ Error: {e}")
-                
-            elif args.llm_cmd in ["status", "info"]:
-                # Check LLM status via API and config file
-                try:
-                    # Get from config file
-                    if get_llm_config:
-                        config = get_llm_config()
-                        config_path = get_config_path()
-                        print(f"📁 Config file: {config_path}")
-                        print(f"📦 Model: {config['model']}")
-                        print(f"🔗 Base URL: {config['base_url']}")
-                    
-                    # Check API
-                    resp = client.get("/config/llm")
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        api_model = data.get('model', 'N/A')
-                        config_model = config.get('model', 'N/A') if get_llm_config else 'N/A'
-                        print(f"\n🌐 API Status:")
-                        print(f"   Model: {api_model}")
-                        print(f"   Context Window: {data.get('context_window', 4096)} tokens")
-                        if api_model != config_model and config_model != 'N/A':
-                            print(f"   (Resolved from: {config_model})")
-                        print(f"   Base URL: {data.get('base_url', 'N/A')}")
-                        if data.get("available"):
-                            print(f"   Status: ✅ Available")
-                        else:
-                            print(f"   Status: ⚠️  Not available")
-                    else:
-                        print(f"\n⚠️  API not responding: {resp.status_code}")
-                    
-                    # Check Ollama directly
-                    config = get_llm_config() if get_llm_config else {"base_url": "http://localhost:11434"}
-                    ollama_url = config.get("base_url", "http://localhost:11434")
-                    try:
-                        ollama_client = httpx.Client(base_url=ollama_url, timeout=2.0)
-                        ollama_resp = ollama_client.get("/api/tags")
-                        if ollama_resp.status_code == 200:
-                            print(f"\n🦙 Ollama: ✅ Running at {ollama_url}")
-                        else:
-                            print(f"\n🦙 Ollama: ⚠️  Not responding at {ollama_url}")
-                    except Exception as e:
-                        print(f"\n🦙 Ollama: ❌ Connection failed - {e}")
-                        print(f"   Make sure Ollama is running: ollama serve")
-                except httpx.ConnectError:
-                    print("❌ API server not running")
-                    if get_llm_config:
-                        config = get_llm_config()
-                        print(f"📦 Config file shows: {config['model']} at {config['base_url']}")
-                        print(f"📏 Context Window: {config.get('context_window', 4096)} tokens")
-                        print(f"⚠️  Note: Ensure Ollama's num_ctx is set to {config.get('context_window', 4096)}")
-                        print(f"   Valid options: 4096, 8192, 16384, 32768, 65536, 131072, 262144")
-                        print(f"   Configure via: OLLAMA_NUM_CTX={config.get('context_window', 4096)}")
-                except Exception as e:
-                    print(f"⚠️  Error: {e}")
-                    
-            elif args.llm_cmd == "test":
-                # Test LLM by making a search request
-                try:
-                    resp = client.post("/search", json={"query": "test", "top_k": 1, "generate_answer": True})
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        if data.get("answer"):
-                            print("✅ LLM connection test passed!")
-                            print(f"   Answer preview: {data['answer'][:100]}...")
-                            if "answer_stats" in data:
-                                stats = data["answer_stats"]
-                                print(f"   Context usage: {stats.get('context_usage_percent', 0):.1f}%")
-                                print(f"   Total tokens: {stats.get('total_tokens', 0):,}")
-                        else:
-                            print("⚠️  LLM responded but no answer generated")
-                    else:
-                        print(f"❌ Test failed: {resp.status_code}")
-                except Exception as e:
-                    print(f"❌ Test error: {e}")
-            
-            elif args.llm_cmd in ["test-context", "test-ctx"]:
-                # Test context window configuration
-                try:
-                    config = get_llm_config() if get_llm_config else {}
-                    payload = {
-                        "model": config.get("model", "llama3.2"),
-                        "base_url": config.get("base_url", "http://localhost:11434"),
-                    }
-                    if args.context_window:
-                        payload["context_window"] = args.context_window
-                    
-                    resp = client.post("/config/llm/test", json=payload)
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        if data.get("validated"):
-                            print("✅ Context window test passed!")
-                            print(f"   Model: {data.get('model')}")
-                            print(f"   Context Window: {data.get('context_window')} tokens")
-                            if data.get("detected_context_window"):
-                                if data["detected_context_window"] == data["context_window"]:
-                                    print(f"   ✅ Detected Ollama: {data['detected_context_window']} (matches)")
-                                else:
-                                    print(f"   ⚠️  Detected Ollama: {data['detected_context_window']} (mismatch!)")
-                            if "test_stats" in data:
-                                stats = data["test_stats"]
-                                print(f"   Usage: {stats.get('context_usage_percent', 0):.1f}%")
-                                print(f"   Tokens: {stats.get('total_tokens', 0):,}")
-                        else:
-                            print(f"❌ Test failed: {data.get('message', 'Unknown error')}")
-                    else:
-                        print(f"❌ API error: {resp.status_code}")
-                except Exception as e:
-                    print(f"❌ Test error: {e}")
-            
-                    
-        elif args.cmd in ["project", "proj", "p"]:
-            if args.proj_cmd in ["create", "new", "add"]:
-                project_name = args.name
-                if set_current_project:
-                    set_current_project(project_name)
-                    print(f"✅ Project '{project_name}' created and set as current")
-                    print(f"💡 Documents indexed without --project will use this project")
-                else:
-                    print(f"✅ Project '{project_name}' created (config module not available)")
-                    print(f"💡 Use --project flag when indexing: codexa i --project {project_name} <files>")
-                    
-            elif args.proj_cmd == "set":
-                if set_current_project:
-                    set_current_project(args.name)
-                    print(f"✅ Current project set to: {args.name}")
-                    print(f"💡 Documents indexed without --project will use this project")
-                else:
-                    print("❌ Config module not available")
-                    
-            elif args.proj_cmd in ["get", "current"]:
+                print("📦 No projects found yet")
                 if get_current_project:
-                    project = get_current_project()
-                    print(f"📦 Current project: {project}")
-                    print(f"💡 Documents indexed without --project will use this project")
-                else:
-                    print("❌ Config module not available")
-                    
-            elif args.proj_cmd in ["list", "ls"]:
-                # Search for all unique projects
-                try:
-                    resp = client.post("/search", json={"query": "", "top_k": 1000, "generate_answer": False})
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        results = data.get("results", [])
-                        projects = set()
-                        for result in results:
-                            project = result.get("metadata", {}).get("project")
-                            if project:
-                                projects.add(project)
-                        if projects:
-                            print("📦 Projects found in knowledge vault:")
-                            for proj in sorted(projects):
-                                current_marker = ""
-                                if get_current_project:
-                                    current = get_current_project()
-                                    if current == proj:
-                                        current_marker = " (current)"
-                                print(f"  • {proj}{current_marker}")
-                        else:
-                            print("📦 No projects found yet")
-                            if get_current_project:
-                                current = get_current_project()
-                                print(f"💡 Current project: {current}")
-                            print("💡 Create a project: codexa project create <name>")
-                    else:
-                        print(f"❌ Error: {resp.status_code}")
-                except Exception as e:
-                    print(f"❌ Error: {e}")
+                    current = get_current_project()
+                    print(f"💡 Current project: {current}")
+                print("💡 Create a project: codexa project create <name>")
+        else:
+            print(f"❌ Error: {resp.status_code}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+    return 0
+
+
+# Every CLI command: the names (and aliases) it answers to, its subparser builder and its handler
+_COMMANDS: List[Tuple[Tuple[str, ...], Callable[[Any], None], Callable[..., int]]] = [
+    (("index", "i"), _add_index_parser, _cmd_index),
+    (("index-dir", "i-dir", "dir"), _add_index_dir_parser, _cmd_index_dir),
+    (("reindex", "ri"), _add_reindex_parser, _cmd_reindex),
+    (("search", "s"), _add_search_parser, _cmd_search),
+    (("delete", "d", "del"), _add_delete_parser, _cmd_delete),
+    (("index-web", "web", "w"), _add_index_web_parser, _cmd_index_web),
+    (("llm",), _add_llm_parser, _cmd_llm),
+    (("project", "proj", "p"), _add_project_parser, _cmd_project),
+]
+_SUBPARSER_BUILDERS: Dict[str, Callable[[Any], None]] = {
+    name: builder for names, builder, _ in _COMMANDS for name in names
+}
+_HANDLERS: Dict[str, Callable[..., int]] = {name: handler for names, _, handler in _COMMANDS for name in names}
+
+
+def _is_local_command(args: argparse.Namespace) -> bool:
+    """Whether the command only touches the local config file (no HTTP needed)."""
+    return args.cmd in ["project", "proj", "p"] and args.proj_cmd not in ["list", "ls"]
 
+
+def _run_persistent(outer: argparse.Namespace, client: "httpx.Client") -> int:
+    """Run one command per stdin line, reusing the same HTTP client.
+
+    Each line starts from the global options given on the outer command line
+    (``--raw``, ``--batch-size``, ...); the connection settings are fixed by
+    ``client``. Blank lines and lines starting with ``#`` are skipped. A line
+    that fails to parse or run prints its error and the loop moves on.
+    """
+    global_options = {name: getattr(outer, name) for name in _GLOBAL_OPTION_DESTS}
+    for line in sys.stdin:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            argv = shlex.split(line)
+            # argparse only fills in defaults for attributes the namespace lacks
+            args = _get_parser(argv).parse_args(argv, argparse.Namespace(**global_options))
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            continue
+        except SystemExit:
+            # argparse already printed the error (or --help)
+            continue
+        if args.cmd is None:
+            print("❌ Error: No command given")
+        elif getattr(args, "files_from", None) == "-":
+            # stdin is the command stream here, not a list of paths
+            print("❌ Error: --files-from - is not available with --serve; pass a file path")
+        else:
+            try:
+                if _is_local_command(args):
+                    _run_project_local(args)
+                else:
+                    _HANDLERS[args.cmd](args, client)
+            except Exception as e:
+                print(f"❌ Error: {e}")
+        # Let a driving script read each command's output before sending the next
+        sys.stdout.flush()
     return 0
 
 
+def main(argv: Optional[List[str]] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv == ["--version"]:
+        # Fast path: answer without building any parser
+        print(f"{os.path.basename(sys.argv[0])} {_version()}")
+        return 0
+    parser = _get_parser(argv)
+    args = parser.parse_args(argv)
+    if args.cmd is None and not args.persistent:
+        parser.error("the following arguments are required: cmd")
+    if _is_local_command(args):
+        return _run_project_local(args)
+
+    # Imported here: httpx is slow to import and config-only commands never need it
+    import httpx
+
+    # Fail fast when the server is down; connection retries happen in the transport
+    with httpx.Client(
+        base_url=args.base_url,
+        headers=_auth_headers(args),
+        timeout=httpx.Timeout(_REQUEST_TIMEOUT, connect=_CONNECT_TIMEOUT),
+        # httpx ignores Client(limits=...) when a transport is given; set it here
+        transport=httpx.HTTPTransport(
+            retries=_CONNECT_RETRIES, limits=httpx.Limits(max_keepalive_connections=4)
+        ),
+    ) as client:
+        if args.persistent:
+            return _run_persistent(args, client)
+        return _HANDLERS[args.cmd](args, client)
+
+
 if __name__ == "__main__":
     sys.exit(main())
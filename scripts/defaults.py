@@ -0,0 +1,4 @@
+"""Defaults shared by the Codexa scripts (kept free of imports so it loads instantly)."""
+
+# File types the server has parsers for
+DEFAULT_EXTENSIONS = (".md", ".py")
@@ -5,13 +5,43 @@ Validation script for Codexa implementation.
 This script checks that all required components are present and functional.
 """
 
+import os
 import sys
-from pathlib import Path
+from functools import lru_cache
+from typing import Set, Tuple
+
+# Deepest path checked below is .github/workflows/ci.yml
+_MAX_DEPTH = 3
+
+
+@lru_cache(maxsize=1)
+def _scan_tree(root: str = ".", max_depth: int = _MAX_DEPTH) -> Tuple[Set[str], Set[str]]:
+    """Walk the project once and collect relative file and directory paths.
+
+    Args:
+        root: Directory to walk
+        max_depth: Maximum number of path components to collect
+
+    Returns:
+        Tuple of (file paths, directory paths), '/'-separated and relative to root
+    """
+    files: Set[str] = set()
+    dirs: Set[str] = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        prefix = "" if rel == "." else rel.replace(os.sep, "/") + "/"
+        depth = prefix.count("/")
+        files.update(prefix + name for name in filenames)
+        dirs.update(prefix + name for name in dirnames)
+        if depth + 1 >= max_depth:
+            # Children of these directories would be deeper than max_depth
+            dirnames[:] = []
+    return files, dirs
 
 
 def check_file_exists(path: str, description: str) -> bool:
     """Check if a file exists."""
-    if Path(path).exists():
+    if path in _scan_tree()[0]:
         print(f"✓ {description}")
         return True
     else:
@@ -21,7 +51,7 @@ def check_file_exists(path: str, description: str) -> bool:
 
 def check_directory_exists(path: str, description: str) -> bool:
     """Check if a directory exists."""
-    if Path(path).is_dir():
+    if path in _scan_tree()[1]:
         print(f"✓ {description}")
         return True
     else:
@@ -1,6 +1,26 @@
 """Pytest configuration and fixtures."""
 
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterator
+
 import pytest
+import pytest_asyncio
+
+if TYPE_CHECKING:
+    import httpx
+    from core.parsers import ParserRegistry, PythonParser
+
+
+@pytest.fixture(scope="session", autouse=True)
+def chroma_dir(tmp_path_factory: pytest.TempPathFactory) -> Iterator[str]:
+    """Point the app at a ChromaDB directory private to this test process.
+
+    Under pytest-xdist each worker gets its own base temp dir, so workers
+    never contend for the same Chroma SQLite database.
+    """
+    path = str(tmp_path_factory.mktemp("chroma"))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("CODEXA_CHROMA_DIR", path)
+        yield path
 
 
 @pytest.fixture(autouse=True)
@@ -8,3 +28,72 @@ def cleanup_chroma() -> None:
     """Clean up ChromaDB data after each test."""
     yield
     # Cleanup happens in individual tests as needed
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client() -> AsyncIterator["httpx.AsyncClient"]:
+    """Create an async client shared by the whole session.
+
+    Requests go straight to the ASGI app, so independent tests can overlap
+    on one event loop. ``ASGITransport`` does not run the app lifespan
+    (embedding model, ChromaDB, encryption key), so it is entered here,
+    once.
+    """
+    import httpx
+    from core.api import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+            yield test_client
+
+
+@pytest.fixture(scope="session")
+def py_parser() -> "PythonParser":
+    """Python parser shared by the whole session."""
+    from core.parsers import PythonParser
+
+    return PythonParser()
+
+
+@pytest.fixture(scope="session")
+def registry() -> "ParserRegistry":
+    """Parser registry shared by the whole session."""
+    from core.parsers import ParserRegistry
+
+    return ParserRegistry()
+
+
+# Shared search corpus: file name -> (content, encrypt)
+_CORPUS = {
+    "ml.md": ("# Machine Learning\n\nThis document is about neural networks and AI.", False),
+    "fruit_0.md": ("# Doc 0\n\napple banana cherry 0", False),
+    "fruit_1.md": ("# Doc 1\n\napple banana cherry 1", False),
+    "secret.md": ("# Secret Document\n\nThis is sensitive information.", True),
+}
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def indexed_corpus(
+    client: "httpx.AsyncClient", tmp_path_factory: pytest.TempPathFactory
+) -> Dict[str, str]:
+    """Write and index the shared search corpus once per session.
+
+    Returns:
+        Mapping of corpus file name to its absolute path
+    """
+    corpus_dir = tmp_path_factory.mktemp("corpus")
+    paths: Dict[str, str] = {}
+    for name, (content, _) in _CORPUS.items():
+        path = corpus_dir / name
+        path.write_text(content)
+        paths[name] = str(path)
+
+    # One /index request per encryption setting
+    for encrypt in (False, True):
+        batch = [paths[name] for name, (_, enc) in _CORPUS.items() if enc is encrypt]
+        response = await client.post("/index", json={"file_paths": batch, "encrypt": encrypt})
+        assert response.status_code == 201
+        assert response.json()["indexed_count"] == len(batch)
+
+    return paths
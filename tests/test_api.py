@@ -1,84 +1,72 @@
 """Tests for API endpoints."""
 
-import pytest
-from fastapi.testclient import TestClient
-import tempfile
-import os
-import contextlib
-
+import asyncio
+from pathlib import Path
+from typing import Dict
 
-@pytest.fixture
-def client() -> TestClient:
-    """Create test client with proper lifecycle."""
-    from core.api import app
+import httpx
+import pytest
 
-    # Use context manager to ensure lifespan is triggered
-    with TestClient(app) as test_client:
-        yield test_client
+# All tests share the session client, so they must share its event loop too
+pytestmark = pytest.mark.asyncio(loop_scope="session")
 
 
-def test_root_endpoint(client: TestClient) -> None:
+async def test_root_endpoint(client: httpx.AsyncClient) -> None:
     """Test root endpoint."""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     data = response.json()
     assert data["message"] == "Codexa API"
     assert "version" in data
 
 
-def test_health_check(client: TestClient) -> None:
+async def test_health_check(client: httpx.AsyncClient) -> None:
     """Test health check endpoint."""
-    response = client.get("/health")
+    response = await client.get("/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
 
 
-def test_index_endpoint(client: TestClient) -> None:
+async def test_index_endpoint(client: httpx.AsyncClient, tmp_path: Path) -> None:
     """Test document indexing."""
-    # Create temporary test file
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".md", delete=False) as f:
-        f.write("# Test Document\n\nThis is test content.")
-        temp_path = f.name
-
-    try:
-        response = client.post("/index", json={"file_paths": [temp_path], "encrypt": False})
-        assert response.status_code == 201
-        data = response.json()
-        assert data["indexed_count"] == 1
-        assert data["failed_count"] == 0
-        assert len(data["document_ids"]) == 1
-    finally:
-        os.unlink(temp_path)
-
-def test_api_key_required_for_index(monkeypatch) -> None:
+    temp_path = tmp_path / "test.md"
+    temp_path.write_text("# Test Document\n\nThis is test content.")
+
+    response = await client.post(
+        "/index", json={"file_paths": [str(temp_path)], "encrypt": False}
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["indexed_count"] == 1
+    assert data["failed_count"] == 0
+    assert len(data["document_ids"]) == 1
+
+async def test_api_key_required_for_index(client: httpx.AsyncClient, monkeypatch) -> None:
     """Test that API key is enforced when configured."""
-    with contextlib.ExitStack() as stack:
-        stack.enter_context(monkeypatch.context())
-        os.environ["CODEXA_API_KEY"] = "secret"
-        from core.api import app
-        with TestClient(app) as client:
-            # Missing key should fail
-            response = client.post("/index", json={"file_paths": [], "encrypt": False})
-            assert response.status_code == 401
-            # Wrong key should fail
-            response = client.post(
-                "/index",
-                headers={"X-API-Key": "wrong"},
-                json={"file_paths": [], "encrypt": False},
-            )
-            assert response.status_code == 401
-            # Correct key should pass (even if no files)
-            response = client.post(
-                "/index",
-                headers={"X-API-Key": "secret"},
-                json={"file_paths": [], "encrypt": False},
-            )
-            assert response.status_code == 201
-        del os.environ["CODEXA_API_KEY"]
-
-def test_index_nonexistent_file(client: TestClient) -> None:
+    # The key is read per request, so the shared client picks it up
+    monkeypatch.setenv("CODEXA_API_KEY", "secret")
+    # Missing and wrong keys should both fail
+    missing, wrong = await asyncio.gather(
+        client.post("/index", json={"file_paths": [], "encrypt": False}),
+        client.post(
+            "/index",
+            headers={"X-API-Key": "wrong"},
+            json={"file_paths": [], "encrypt": False},
+        ),
+    )
+    assert missing.status_code == 401
+    assert wrong.status_code == 401
+    # Correct key should pass (even if no files)
+    response = await client.post(
+        "/index",
+        headers={"X-API-Key": "secret"},
+        json={"file_paths": [], "encrypt": False},
+    )
+    assert response.status_code == 201
+
+async def test_index_nonexistent_file(client: httpx.AsyncClient) -> None:
     """Test indexing non-existent file."""
-    response = client.post(
+    response = await client.post(
         "/index", json={"file_paths": ["/nonexistent/file.md"], "encrypt": False}
     )
     assert response.status_code == 201
@@ -87,31 +75,19 @@ def test_index_nonexistent_file(client: TestClient) -> None:
     assert data["failed_count"] == 1
 
 
-def test_search_endpoint(client: TestClient) -> None:
+async def test_search_endpoint(client: httpx.AsyncClient, indexed_corpus: Dict[str, str]) -> None:
     """Test search endpoint."""
-    # First, index a document
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".md", delete=False) as f:
-        f.write("# Machine Learning\n\nThis document is about neural networks and AI.")
-        temp_path = f.name
-
-    try:
-        # Index the document
-        client.post("/index", json={"file_paths": [temp_path], "encrypt": False})
-
-        # Search for it
-        response = client.post("/search", json={"query": "artificial intelligence", "top_k": 5})
-        assert response.status_code == 200
-        data = response.json()
-        assert data["query"] == "artificial intelligence"
-        assert "results" in data
-        assert data["total_results"] >= 0
-    finally:
-        os.unlink(temp_path)
-
-
-def test_search_with_file_type_filter(client: TestClient) -> None:
+    response = await client.post("/search", json={"query": "artificial intelligence", "top_k": 5})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["query"] == "artificial intelligence"
+    assert "results" in data
+    assert data["total_results"] >= 0
+
+
+async def test_search_with_file_type_filter(client: httpx.AsyncClient) -> None:
     """Test search with file type filter."""
-    response = client.post(
+    response = await client.post(
         "/search", json={"query": "test query", "top_k": 5, "file_type": "py", "offset": 0}
     )
     assert response.status_code == 200
@@ -119,60 +95,43 @@ def test_search_with_file_type_filter(client: TestClient) -> None:
     assert data["query"] == "test query"
 
 
-def test_encrypted_indexing_and_search(client: TestClient) -> None:
+async def test_encrypted_indexing_and_search(
+    client: httpx.AsyncClient, indexed_corpus: Dict[str, str]
+) -> None:
     """Test indexing and searching encrypted content."""
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".md", delete=False) as f:
-        f.write("# Secret Document\n\nThis is sensitive information.")
-        temp_path = f.name
-
-    try:
-        # Index with encryption
-        response = client.post("/index", json={"file_paths": [temp_path], "encrypt": True})
-        assert response.status_code == 201
-
-        # Search should still work (decryption happens during search)
-        response = client.post("/search", json={"query": "sensitive information", "top_k": 5})
-        assert response.status_code == 200
-    finally:
-        os.unlink(temp_path)
-
-def test_search_pagination_and_filters(client: TestClient) -> None:
+    # The corpus indexes secret.md with encryption enabled
+    assert "secret.md" in indexed_corpus
+
+    # Search should still work (decryption happens during search)
+    response = await client.post("/search", json={"query": "sensitive information", "top_k": 5})
+    assert response.status_code == 200
+
+async def test_search_pagination_and_filters(
+    client: httpx.AsyncClient, indexed_corpus: Dict[str, str]
+) -> None:
     """Test search pagination and custom filters."""
-    # Index two small docs
-    paths = []
-    for i in range(2):
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".md", delete=False) as f:
-            f.write(f"# Doc {i}\n\napple banana cherry {i}")
-            paths.append(f.name)
-    try:
-        client.post("/index", json={"file_paths": paths, "encrypt": False})
-        # Request with offset 1
-        response = client.post(
-            "/search",
-            json={"query": "banana", "top_k": 1, "offset": 1, "filters": {"file_type": "md"}},
-        )
-        assert response.status_code == 200
-        data = response.json()
-        assert data["total_results"] in (0, 1)
-    finally:
-        for p in paths:
-            os.unlink(p)
-
-
-def test_delete_document_endpoint(client: TestClient) -> None:
+    # The corpus contains two small "apple banana cherry" docs
+    response = await client.post(
+        "/search",
+        json={"query": "banana", "top_k": 1, "offset": 1, "filters": {"file_type": "md"}},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_results"] in (0, 1)
+
+
+async def test_delete_document_endpoint(client: httpx.AsyncClient, tmp_path: Path) -> None:
     """Test deleting a document by ID."""
-    # Create a temp file and index it
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".md", delete=False) as f:
-        f.write("# To Delete\n\nRemove me.")
-        temp_path = f.name
-
-    try:
-        response = client.post("/index", json={"file_paths": [temp_path], "encrypt": False})
-        assert response.status_code == 201
-        doc_id = response.json()["document_ids"][0]
-
-        # Delete the document
-        del_response = client.delete(f"/documents/{doc_id}")
-        assert del_response.status_code == 204
-    finally:
-        os.unlink(temp_path)
+    # Index a document of its own so the shared corpus stays intact
+    temp_path = tmp_path / "delete_me.md"
+    temp_path.write_text("# To Delete\n\nRemove me.")
+
+    response = await client.post(
+        "/index", json={"file_paths": [str(temp_path)], "encrypt": False}
+    )
+    assert response.status_code == 201
+    doc_id = response.json()["document_ids"][0]
+
+    # Delete the document
+    del_response = await client.delete(f"/documents/{doc_id}")
+    assert del_response.status_code == 204
@@ -3,8 +3,9 @@
 import builtins
 import contextlib
 import io
+import json
 import sys
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 import types
 
 import pytest
@@ -16,15 +17,32 @@ class FakeResponse:
     def __init__(self, status_code: int = 200, json_data: Optional[Dict[str, Any]] = None):
         self.status_code = status_code
         self._json = json_data or {}
+        self.content = json.dumps(self._json).encode()
+        self.headers = {"content-type": "application/json"}
+
+    @property
+    def is_success(self) -> bool:
+        return 200 <= self.status_code < 300
 
     def json(self) -> Dict[str, Any]:
         return self._json
 
+    def read(self) -> bytes:
+        return self.content
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        # Small chunks so incremental decoding sees results split across reads
+        for start in range(0, len(self.content), 16):
+            yield self.content[start:start + 16]
+
 
 class FakeClient:
-    def __init__(self, base_url: str, headers: Dict[str, str], timeout: float):
+    # Results returned by /search
+    search_results: List[Dict[str, Any]] = []
+
+    def __init__(self, base_url: str, timeout: Any, headers: Optional[Dict[str, str]] = None, **kwargs: Any):
         self.base_url = base_url
-        self.headers = headers
+        self.headers = headers or {}
         self.timeout = timeout
         self.requests: List[Dict[str, Any]] = []
 
@@ -34,6 +52,13 @@ class FakeClient:
     def __exit__(self, exc_type, exc, tb):
         return False
 
+    def request(self, method: str, path: str, content: bytes = b"", headers: Optional[Dict[str, str]] = None):
+        body = json.loads(content) if content else None
+        if method == "POST":
+            return self.post(path, json=body)
+        self.requests.append({"method": method, "path": path, "json": body})
+        return FakeResponse(200, {"message": "ok"})
+
     # HTTP verbs
     def post(self, path: str, json: Optional[Dict[str, Any]] = None):
         self.requests.append({"method": "POST", "path": path, "json": json})
@@ -47,23 +72,34 @@ class FakeClient:
         if path == "/index/web":
             return FakeResponse(201, {"document_id": "web-1", "status": "indexed", "message": "ok"})
         if path == "/search":
-            return FakeResponse(200, {"query": json.get("query"), "results": [], "total_results": 0})
+            return FakeResponse(
+                200,
+                {"query": json.get("query"), "results": self.search_results, "total_results": len(self.search_results)},
+            )
         return FakeResponse(200, {})
 
+    @contextlib.contextmanager
+    def stream(self, method: str, path: str, content: bytes = b"", headers: Optional[Dict[str, str]] = None):
+        yield self.request(method, path, content=content, headers=headers)
+
     def delete(self, path: str):
         self.requests.append({"method": "DELETE", "path": path})
         return FakeResponse(204, {})
 
 
 @pytest.fixture(autouse=True)
-def patch_httpx(monkeypatch):
-    # Patch httpx.Client to our FakeClient
+def patch_httpx(monkeypatch) -> List[FakeClient]:
+    # Patch httpx.Client to our FakeClient; tests can inspect the clients created
     import httpx  # noqa: F401
 
+    created: List[FakeClient] = []
+
     def _client(**kwargs):
-        return FakeClient(**kwargs)
+        created.append(FakeClient(**kwargs))
+        return created[-1]
 
-    monkeypatch.setattr("scripts.cli.httpx.Client", _client)
+    monkeypatch.setattr("httpx.Client", _client)
+    return created
 
 
 def run_cli_args(args: List[str]) -> str:
@@ -80,30 +116,48 @@ def run_cli_args(args: List[str]) -> str:
 
 def test_cli_index_files() -> None:
     out = run_cli_args(["--base-url", "http://x", "index", "/a.md", "/b.py"])
-    assert "201" in out
-    assert "indexed_count" in out
+    assert "Error" not in out
+    assert "Indexed 2 file(s)" in out
+
+
+def test_cli_index_sends_every_batch(patch_httpx: List[FakeClient]) -> None:
+    out = run_cli_args(["--batch-size", "1", "index", "/a.md", "/b.md", "/c.md"])
+    assert [r["json"]["file_paths"] for r in patch_httpx[0].requests] == [["/a.md"], ["/b.md"], ["/c.md"]]
+    assert "Error" not in out
+    assert "Indexed 3 file(s)" in out
 
 
 def test_cli_index_directory() -> None:
     out = run_cli_args(["index-dir", "/proj", "--extensions", ".md", ".py", "--no-recursive"])
-    assert "201" in out
-    assert "document_ids" in out
+    assert "Error" not in out
+    assert "Indexed 2 file(s)" in out
 
 
-def test_cli_search_filters() -> None:
+def test_cli_search_filters(patch_httpx: List[FakeClient]) -> None:
     out = run_cli_args(
-        ["search", "--query", "q", "--top-k", "5", "--offset", "1", "--file-type", "md", "--filter", "source=web"]
+        ["search", "q", "--top-k", "5", "--offset", "1", "--file-type", "md", "--filter", "source=web"]
     )
-    assert "200" in out
-    assert '"total_results": 0' in out
+    assert "No results found for: 'q'" in out
+    payload = patch_httpx[0].requests[0]["json"]
+    assert payload["top_k"] == 5
+    assert payload["offset"] == 1
+    assert payload["file_type"] == "md"
+    assert payload["filters"] == {"source": "web"}
+
+
+def test_cli_search_ignores_malformed_filter(patch_httpx: List[FakeClient]) -> None:
+    run_cli_args(["search", "q", "--filter", "bogus", "--filter", "lang=en=us"])
+    # Items without '=' are dropped; the value keeps any further '='
+    assert patch_httpx[0].requests[0]["json"]["filters"] == {"lang": "en=us"}
 
 
-def test_cli_delete() -> None:
-    out = run_cli_args(["delete", "abc-123"])
-    assert "204" in out
+def test_cli_delete(patch_httpx: List[FakeClient]) -> None:
+    out = run_cli_args(["delete", "id", "abc-123"])
+    assert "Deleted document abc-123" in out
+    assert patch_httpx[0].requests == [{"method": "DELETE", "path": "/documents/abc-123"}]
 
 
-def test_cli_index_web() -> None:
+def test_cli_index_web(patch_httpx: List[FakeClient]) -> None:
     out = run_cli_args(
         [
             "index-web",
@@ -119,11 +173,126 @@ def test_cli_index_web() -> None:
             "author=alice",
         ]
     )
-    assert "201" in out
-    assert "web-1" in out
+    assert "Error" not in out
+    assert "Indexed web content: web-1" in out
+    payload = patch_httpx[0].requests[0]["json"]
+    assert payload["content"] == "# Md"
+    assert payload["tags"] == ["web"]
+    assert payload["metadata"] == {"author": "alice"}
+
+
+def test_cli_index_web_content_file(patch_httpx: List[FakeClient], tmp_path) -> None:
+    page = tmp_path / "page.md"
+    page.write_text("# Page\n\nLong body", encoding="utf-8")
+    out = run_cli_args(
+        ["index-web", "--url", "https://example.com", "--title", "Example", "--content-file", str(page)]
+    )
+    assert "Indexed web content: web-1" in out
+    assert patch_httpx[0].requests[0]["json"]["content"] == "# Page\n\nLong body"
+
+
+def test_cli_reindex(patch_httpx: List[FakeClient]) -> None:
+    out = run_cli_args(["--batch-size", "1", "reindex", "/a.md", "/b.md"])
+    assert [r["json"]["file_paths"] for r in patch_httpx[0].requests] == [["/a.md"], ["/b.md"]]
+    assert "Error" not in out
+    assert "Reindexed 2 file(s)" in out
+
+
+def test_cli_version() -> None:
+    out = run_cli_args(["--version"])
+    assert cli._version() in out
+
+
+def test_cli_parser_only_builds_requested_subcommand() -> None:
+    parser = cli._get_parser(["--base-url", "http://x", "s", "query"])
+    help_text = parser.format_help()
+    assert "search" in help_text
+    assert "index-web" not in help_text
+
+
+def test_cli_persistent_reuses_client(monkeypatch, patch_httpx: List[FakeClient]) -> None:
+    monkeypatch.setattr("sys.stdin", io.StringIO("reindex /a.md\n\nindex /b.md /c.md\n"))
+    run_cli_args(["--persistent"])
+    assert len(patch_httpx) == 1
+    assert [r["path"] for r in patch_httpx[0].requests] == ["/reindex", "/index"]
+
+
+def test_cli_serve_skips_bad_lines(monkeypatch, patch_httpx: List[FakeClient]) -> None:
+    monkeypatch.setattr(
+        "sys.stdin", io.StringIO("# comment\nbogus-command\nsearch 'unclosed\nindex /a.md\n")
+    )
+    run_cli_args(["--serve"])
+    assert [r["path"] for r in patch_httpx[0].requests] == ["/index"]
+
+
+def test_cli_serve_applies_global_options_and_survives_errors(
+    monkeypatch, tmp_path, patch_httpx: List[FakeClient]
+) -> None:
+    missing = tmp_path / "missing.txt"
+    monkeypatch.setattr(
+        "sys.stdin",
+        io.StringIO(f"index --files-from -\nindex --files-from {missing}\nindex /a.md /b.md\n"),
+    )
+    out = run_cli_args(["--batch-size", "1", "--raw", "--serve"])
+    # --files-from - is refused, the missing file is reported, and the session carries on
+    assert "--files-from -" in out
+    assert "missing.txt" in out
+    assert [r["json"]["file_paths"] for r in patch_httpx[0].requests] == [["/a.md"], ["/b.md"]]
+    # --raw from the outer command line applies: one compact JSON line per batch
+    assert out.count('{"indexed_count": 1') == 2
+
+
+def test_cli_raw_error_keeps_stdout_machine_readable(monkeypatch, capsys) -> None:
+    monkeypatch.setattr(FakeClient, "post", lambda self, path, json=None: FakeResponse(500, {"detail": "boom"}))
+    out = run_cli_args(["--raw", "index", "/a.md"])
+    assert json.loads(out) == {"detail": "boom"}
+    assert "Error: 500" in capsys.readouterr().err
+
+
+def test_cli_raw_search_prints_compact_json() -> None:
+    out = run_cli_args(["--raw", "search", "q", "--no-answer"])
+    assert json.loads(out) == {"query": "q", "results": [], "total_results": 0}
+    assert "\n" not in out.rstrip("\n")
+
+
+def test_cli_llm_list_reports_invalid_url(monkeypatch) -> None:
+    import httpx
+
+    def _get(self, path: str):
+        raise httpx.InvalidURL("Invalid port: ':1'")
+
+    monkeypatch.setattr(FakeClient, "get", _get, raising=False)
+    out = run_cli_args(["llm", "list"])
+    assert "❌ Error: Invalid port" in out
+
+
+_SEARCH_RESULTS = [
+    {"file_path": "/a.md", "file_type": "md", "score": 0.9, "content": "alpha\nbeta", "metadata": {"project": "p1"}},
+    {"file_path": "/b.py", "file_type": "py", "score": 0.5, "content": "gamma", "metadata": {"project": "p2"}},
+]
+
+
+@pytest.fixture(params=["ijson", "stdlib"])
+def streamed_search(request, monkeypatch) -> None:
+    """Serve _SEARCH_RESULTS from /search, decoded with ijson and without it."""
+    if request.param == "ijson":
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(cli, "_import_ijson", lambda: None)
+    monkeypatch.setattr(FakeClient, "search_results", _SEARCH_RESULTS)
+
 
+def test_cli_search_no_answer_streams_results(streamed_search, patch_httpx: List[FakeClient]) -> None:
+    out = run_cli_args(["search", "q", "--no-answer"])
+    assert "Found 2 result(s)" in out
+    assert "[1] /a.md (md) - 90%" in out
+    assert "alpha beta" in out
+    assert "[2] /b.py (py) - 50%" in out
+    assert patch_httpx[0].requests[0]["json"]["generate_answer"] is False
 
-def test_cli_reindex() -> None:
-    out = run_cli_args(["reindex", "/a.md"])
-    assert "201" in out
 
+def test_cli_project_list_streams_results(streamed_search, monkeypatch) -> None:
+    monkeypatch.setattr(cli, "get_current_project", lambda: "p2")
+    out = run_cli_args(["project", "list"])
+    assert "• p1\n" in out
+    assert "• p2 (current)" in out
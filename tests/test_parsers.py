@@ -1,33 +1,14 @@
 """Tests for file parsers."""
 
-import pytest
-import tempfile
 import os
-from core.parsers import MarkdownParser, PythonParser, ParserRegistry
-
-
-def test_markdown_parser() -> None:
-    """Test Markdown file parsing."""
-    parser = MarkdownParser()
-
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".md", delete=False) as f:
-        f.write("# Test Document\n\nThis is a test.")
-        temp_path = f.name
-
-    try:
-        result = parser.parse(temp_path)
-        assert result["file_type"] == "md"
-        assert "Test Document" in result["content"]
-        assert result["file_name"] == os.path.basename(temp_path)
-    finally:
-        os.unlink(temp_path)
+from pathlib import Path
+from typing import Any, Callable, Dict
 
+import pytest
+from core.parsers import MarkdownParser, PythonParser, ParserRegistry
 
-def test_markdown_with_frontmatter() -> None:
-    """Test Markdown parsing with YAML frontmatter."""
-    parser = MarkdownParser()
 
-    content = """---
+_FRONTMATTER_MD = """---
 title: Test Document
 author: Test Author
 ---
@@ -37,24 +18,16 @@ author: Test Author
 Content here.
 """
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".md", delete=False) as f:
-        f.write(content)
-        temp_path = f.name
-
-    try:
-        result = parser.parse(temp_path)
-        assert result["metadata"]["title"] == "Test Document"
-        assert result["metadata"]["author"] == "Test Author"
-        assert "Heading" in result["content"]
-    finally:
-        os.unlink(temp_path)
-
+_YAML_FRONTMATTER_MD = """---
+title: Typed
+tags: [a, b]
+draft: true
+---
 
-def test_python_parser() -> None:
-    """Test Python file parsing."""
-    parser = PythonParser()
+Body.
+"""
 
-    code = '''"""Module docstring."""
+_PYTHON_SOURCE = '''"""Module docstring."""
 
 def test_function():
     """Function docstring."""
@@ -65,66 +38,253 @@ class TestClass:
     pass
 '''
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
-        f.write(code)
-        temp_path = f.name
+_INVALID_PYTHON = "def invalid syntax here"
 
-    try:
-        result = parser.parse(temp_path)
-        assert result["file_type"] == "py"
-        assert "test_function" in result["metadata"]["functions"]
-        assert "TestClass" in result["metadata"]["classes"]
-        assert result["metadata"]["docstring"] == "Module docstring."
-    finally:
-        os.unlink(temp_path)
 
+def _check_markdown(result: Dict[str, Any]) -> None:
+    assert result["file_type"] == "md"
+    assert "Test Document" in result["content"]
+    assert result["file_name"] == "test.md"
 
-def test_python_parser_invalid_syntax() -> None:
-    """Test Python parser with invalid syntax."""
-    parser = PythonParser()
 
-    code = "def invalid syntax here"
+def _check_frontmatter(result: Dict[str, Any]) -> None:
+    assert result["metadata"]["title"] == "Test Document"
+    assert result["metadata"]["author"] == "Test Author"
+    assert "Heading" in result["content"]
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
-        f.write(code)
-        temp_path = f.name
 
-    try:
-        result = parser.parse(temp_path)
-        # Should still return content even with syntax error
-        assert result["file_type"] == "py"
-        assert result["content"] == code
-    finally:
-        os.unlink(temp_path)
+def _check_yaml_frontmatter(result: Dict[str, Any]) -> None:
+    # Values that are not plain strings still go through YAML
+    assert result["metadata"] == {"title": "Typed", "tags": ["a", "b"], "draft": True}
+    assert result["content"].strip() == "Body."
 
 
-def test_parser_registry() -> None:
-    """Test parser registry."""
-    registry = ParserRegistry()
+def _check_python(result: Dict[str, Any]) -> None:
+    assert result["file_type"] == "py"
+    assert "test_function" in result["metadata"]["functions"]
+    assert "TestClass" in result["metadata"]["classes"]
+    assert result["metadata"]["docstring"] == "Module docstring."
+
+
+def _check_invalid_python(result: Dict[str, Any]) -> None:
+    # Should still return content even with syntax error
+    assert result["file_type"] == "py"
+    assert result["content"] == _INVALID_PYTHON
+
+
+_PARSE_CASES = [
+    pytest.param(".md", "# Test Document\n\nThis is a test.", _check_markdown, id="markdown"),
+    pytest.param(".md", _FRONTMATTER_MD, _check_frontmatter, id="markdown-frontmatter"),
+    pytest.param(".md", _YAML_FRONTMATTER_MD, _check_yaml_frontmatter, id="markdown-yaml"),
+    pytest.param(".py", _PYTHON_SOURCE, _check_python, id="python"),
+    pytest.param(".py", _INVALID_PYTHON, _check_invalid_python, id="python-invalid-syntax"),
+]
+
+
+@pytest.mark.parametrize("suffix,content,checks", _PARSE_CASES)
+def test_parse(
+    registry: ParserRegistry,
+    suffix: str,
+    content: str,
+    checks: Callable[[Dict[str, Any]], None],
+) -> None:
+    """Test parsing in-memory content with the parser registered for its suffix."""
+    name = f"test{suffix}"
+    checks(registry.get_parser(name).parse_text(content, name))
+
+
+@pytest.mark.parametrize("suffix,content,checks", _PARSE_CASES)
+def test_parse_from_file(
+    registry: ParserRegistry,
+    tmp_path: Path,
+    suffix: str,
+    content: str,
+    checks: Callable[[Dict[str, Any]], None],
+) -> None:
+    """Test that parsing a file on disk gives the same result as in-memory content."""
+    temp_path = tmp_path / f"test{suffix}"
+    temp_path.write_text(content, encoding="utf-8")
+    checks(registry.get_parser(str(temp_path)).parse(str(temp_path)))
+
 
+def test_parser_registry(registry: ParserRegistry) -> None:
+    """Test parser registry."""
     # Test getting parsers
     md_parser = registry.get_parser("test.md")
-    assert isinstance(md_parser, MarkdownParser)
+    assert type(md_parser) is MarkdownParser
 
     py_parser = registry.get_parser("test.py")
-    assert isinstance(py_parser, PythonParser)
+    assert type(py_parser) is PythonParser
 
     # Test unsupported file type
     with pytest.raises(ValueError, match="No parser available"):
         registry.get_parser("test.txt")
 
 
-def test_parse_file_integration() -> None:
+def test_parse_file_integration(registry: ParserRegistry, tmp_path: Path) -> None:
     """Test parsing files through registry."""
-    registry = ParserRegistry()
+    temp_path = tmp_path / "t.md"
+    temp_path.write_text("# Test\n\nContent")
+
+    result = registry.parse_file(str(temp_path))
+    assert result["file_type"] == "md"
+    assert "Test" in result["content"]
+    assert result["file_name"] == "t.md"
+
+
+def test_parse_file_cache(registry: ParserRegistry, tmp_path: Path) -> None:
+    """Test that unchanged files are served from the parse cache."""
+    temp_path = tmp_path / "cached.md"
+    temp_path.write_text("# Cached\n\nContent")
+
+    first = registry.parse_file(str(temp_path))
+    assert registry.parse_file(str(temp_path)) is first
+
+    # A changed file is parsed again
+    temp_path.write_text("# Changed\n\nNew content")
+    second = registry.parse_file(str(temp_path))
+    assert second is not first
+    assert "Changed" in second["content"]
+
+
+def test_python_metadata_cache(py_parser: PythonParser) -> None:
+    """Test that identical source reuses the extracted metadata."""
+    code = "def cached():\n    pass\n"
+
+    first = py_parser.parse_text(code, "a.py")
+    second = py_parser.parse_text(code, "b.py")
+    assert second["metadata"] is first["metadata"]
+    assert second["file_name"] == "b.py"
+
+    # Unparseable source is not cached
+    broken = py_parser.parse_text("def broken(", "c.py")
+    assert broken["metadata"] == {"functions": ("broken",), "classes": ()}
+    assert py_parser.parse_text("def broken(", "c.py")["metadata"] is not broken["metadata"]
+
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".md", delete=False) as f:
-        f.write("# Test\n\nContent")
-        temp_path = f.name
+def test_python_parser_shallow() -> None:
+    """Test the regex scan used when deep parsing is off."""
+    parser = PythonParser(deep=False)
+
+    code = _PYTHON_SOURCE + "\nasync def fetch():\n    def inner():\n        pass\n"
+    result = parser.parse_text(code, "t.py")
+    assert result["metadata"] == {
+        "functions": ("test_function", "fetch"),
+        "classes": ("TestClass",),
+        "docstring": "Module docstring.",
+    }
+
+
+def test_parse_large_file(py_parser: PythonParser, tmp_path: Path) -> None:
+    """Test that memory-mapped reads of large files match text-mode reads."""
+    temp_path = tmp_path / "large.py"
+    code = '"""Big module."""\r\n' + "".join(f"def f{i}():\r\n    pass\r\n" for i in range(5000))
+    temp_path.write_bytes(code.encode("utf-8"))
+
+    result = py_parser.parse(str(temp_path))
+    with open(temp_path, "r", encoding="utf-8") as f:
+        assert result["content"] == f.read()
+    assert len(result["metadata"]["functions"]) == 5000
+
+
+def test_parse_files_parallel(registry: ParserRegistry, tmp_path: Path) -> None:
+    """Test parsing a batch of files across worker processes."""
+    paths = []
+    for i in range(50):
+        suffix = ".md" if i % 2 else ".py"
+        temp_path = tmp_path / f"batch_{i}{suffix}"
+        temp_path.write_text(f"# Doc {i}\n" if i % 2 else f"def f{i}():\n    pass\n")
+        paths.append(str(temp_path))
+
+    results = list(registry.parse_files(paths, max_workers=2))
+    assert len(results) == 50
+    assert [r["file_type"] for r in results] == ["md" if i % 2 else "py" for i in range(50)]
+    assert results[0]["metadata"]["functions"] == ("f0",)
+
+    # The batch fills the parse cache
+    assert registry.parse_file(paths[3]) is results[3]
+
+
+def test_parse_files_shares_content_cache(tmp_path: Path) -> None:
+    """Test that a batch parses identical content once and fills the content cache."""
+    registry = ParserRegistry()
+    paths = []
+    for i in range(6):
+        temp_path = tmp_path / f"dup_{i}.md"
+        temp_path.write_text(f"# Doc {i % 2}\n")
+        paths.append(str(temp_path))
+
+    results = list(registry.parse_files(paths, max_workers=2))
+    assert [r["file_name"] for r in results] == [f"dup_{i}.md" for i in range(6)]
+    assert len(registry._content_cache) == 2
+    assert results[2]["metadata"] is results[0]["metadata"]
+
+    # A copy made after the batch is served from the content cache
+    copy = tmp_path / "copy.md"
+    copy.write_text("# Doc 1\n")
+    assert registry.parse_file(str(copy))["metadata"] is results[1]["metadata"]
+
+
+def test_python_parser_nested_definitions(py_parser: PythonParser) -> None:
+    """Test that methods, nested and async functions are all found."""
+    code = (
+        "class Outer:\n"
+        "    class Inner:\n"
+        "        pass\n"
+        "    def method(self):\n"
+        "        def helper():\n"
+        "            pass\n"
+        "try:\n"
+        "    async def fetch():\n"
+        "        pass\n"
+        "except ImportError:\n"
+        "    def fetch():\n"
+        "        pass\n"
+    )
+    metadata = py_parser.parse_text(code, "nested.py")["metadata"]
+    assert metadata["classes"] == ("Outer", "Inner")
+    assert sorted(metadata["functions"]) == ["fetch", "fetch", "helper", "method"]
+
+
+def test_python_parser_size_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that sources above the size limit skip ast.parse."""
+    monkeypatch.setenv("CODEXA_PYTHON_PARSE_MAX_BYTES", "64")
+    parser = PythonParser()
 
-    try:
-        result = registry.parse_file(temp_path)
-        assert result["file_type"] == "md"
-        assert "Test" in result["content"]
-    finally:
-        os.unlink(temp_path)
+    code = _PYTHON_SOURCE + "\nclass Big:\n    def method(self):\n        pass\n"
+    metadata = parser.parse_text(code, "big.py")["metadata"]
+    # Top-level names only: the regex scan does not see methods
+    assert metadata["functions"] == ("test_function",)
+    assert metadata["classes"] == ("TestClass", "Big")
+
+
+def test_parse_file_content_cache(registry: ParserRegistry, tmp_path: Path) -> None:
+    """Test that identical content is not re-parsed under a new path or mtime."""
+    original = tmp_path / "original.md"
+    original.write_text("# Same\n\nContent")
+    first = registry.parse_file(str(original))
+
+    copy = tmp_path / "copy.md"
+    copy.write_text("# Same\n\nContent")
+    second = registry.parse_file(str(copy))
+    assert second["file_name"] == "copy.md"
+    assert second["metadata"] is first["metadata"]
+    assert second["content"] is first["content"]
+
+    # Touching the file changes its mtime but not its content
+    st = original.stat()
+    os.utime(original, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert registry.parse_file(str(original)) is first
+
+
+def test_parse_results_are_read_only(registry: ParserRegistry, tmp_path: Path) -> None:
+    """Test that cached parse results cannot be modified by callers."""
+    temp_path = tmp_path / "frozen.py"
+    temp_path.write_text("def f():\n    pass\n")
+
+    result = registry.parse_file(str(temp_path))
+    with pytest.raises(TypeError):
+        result["content"] = "changed"  # type: ignore[index]
+    with pytest.raises(TypeError):
+        result["metadata"]["encrypted"] = "true"  # type: ignore[index]
+    assert result["metadata"]["functions"] == ("f",)